@@ -0,0 +1,235 @@
+"""
+File: content_tree.py
+
+Description:
+    Micro-benchmarks of the content tree on synthetic resumes (see synthetic.py)
+from template size to tens of thousands of nodes: building the tree
+(get_content_tree), as_dict, as_html and as_markdown (from scratch, and after
+editing one leaf of an already rendered tree), the pages of ResumeContent
+(as_html from scratch, after editing a leaf and after toggling a Sequence, and
+as_markdown), pre_order, clone (against the as_dict round trip it replaced),
+insert_clone, and ResumeContent.save/load through a JSON file, as well as the
+memory per node of a tree loaded from JSON and the peak allocation of the page.
+
+    Results can be written as JSON and compared with the results of another
+commit; operations slower than the threshold ratio are reported and make the
+script exit with status 1.
+
+Usage (from the repository root):
+    python -m benchmark.content_tree [--sizes template 1k 10k] [--runs N]
+        [--out results.json] [--compare baseline.json] [--threshold 1.25]
+"""
+
+
+
+import argparse
+import gc
+import json
+import os.path as osp
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from src.resume_content import ResumeContent
+from src.resume_content_tree import get_content_tree
+from benchmark.synthetic import PRESETS, count_nodes, synthetic_resume
+
+
+
+def time_op(run, runs: int, teardown = None) -> dict:
+    # times runs calls of run (after an untimed one), calling teardown
+    #   untimed after each call. As in timeit, garbage is collected before
+    #   and not during each call, so collections don't add noise.
+    samples = []
+    for i in range(runs + 1):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            run()
+            elapsed = (time.perf_counter() - start) * 1000
+        finally:
+            gc.enable()
+        if teardown is not None:
+            teardown()
+        if i > 0:
+            samples.append(elapsed)
+    return {
+        "runs": runs,
+        "median_ms": statistics.median(samples),
+        "min_ms": min(samples),
+        "max_ms": max(samples),
+    }
+
+
+def tree_memory(content: dict) -> int:
+    # returns the bytes held by the tree of content once loaded from JSON
+    #   text (and the parsed dictionary freed), as ResumeContent.load does.
+    text = json.dumps(content)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        tree = get_content_tree(json.loads(text))
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del tree
+    return size
+
+
+def peak_memory(run, teardown = None) -> int:
+    # returns the peak bytes allocated while calling run (after teardown).
+    if teardown is not None:
+        teardown()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def bench_size(size: str, runs: int, directory: str) -> dict:
+    # times every operation on the synthetic resume of preset size.
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+    content = synthetic_resume(size)
+    tree = get_content_tree(content)
+    resume = ResumeContent(f"synthetic_{size}", content=tree)
+    bottom = tree.get_bottom_component()
+    path = osp.join(directory, f"synthetic_{size}.json")
+    leaves = [node for node in tree.pre_order() if node.class_name == "TextElement"]
+    leaf = leaves[len(leaves)//2]
+    sequences = [node for node in tree.pre_order() if node.class_name == "Sequence"]
+    sequence = sequences[len(sequences)//2]
+    edits = iter(range(10**9))
+
+    def clear_fragments():
+        for node in tree.pre_order():
+            node.html_version = node.markdown_version = -1
+
+    def edit():
+        leaf.setattr('value', f"edit {next(edits)}")
+
+    def toggle():
+        sequence.setattr('status', 1 - sequence.status)
+
+    clear_fragments()
+    resume.save(path)
+
+    operations = {
+        "get_content_tree": (lambda: get_content_tree(content), None),
+        "as_dict": (lambda: tree.as_dict, None),
+        "as_html": (lambda: tree.as_html, clear_fragments),
+        "as_markdown": (lambda: tree.as_markdown, clear_fragments),
+        "edit_as_html": (lambda: edit() or tree.as_html, None),
+        "edit_as_markdown": (lambda: edit() or tree.as_markdown, None),
+        "page_html": (lambda: resume.as_html, clear_fragments),
+        "edit_page_html": (lambda: edit() or resume.as_html, None),
+        "toggle_page_html": (lambda: toggle() or resume.as_html, None),
+        "page_markdown": (lambda: resume.as_markdown, clear_fragments),
+        "edit_page_markdown": (lambda: edit() or resume.as_markdown, None),
+        "pre_order": (lambda: tree.pre_order(), None),
+        "clone": (lambda: tree.clone(), None),
+        "dict_round_trip": (lambda: get_content_tree(tree.as_dict), None),
+        "insert_clone": (lambda: bottom.insert_clone(0), lambda: bottom.pop(0)),
+        "save": (lambda: resume.save(path), None),
+        "load": (lambda: resume.load(path), None),
+    }
+    nodes = count_nodes(content)
+    return {
+        "size": size,
+        "nodes": nodes,
+        "bytes_per_node": tree_memory(content)/nodes,
+        "page_html_peak_kb": peak_memory(lambda: resume.as_html, clear_fragments)/1024,
+        "operations": {name: time_op(run, runs, teardown)
+                       for name, (run, teardown) in operations.items()},
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    # returns the operations whose median is more than threshold times the
+    #   median of baseline, as printable lines.
+    baseline_ops = {(r["size"], name): stats["median_ms"]
+                    for r in baseline["results"] for name, stats in r["operations"].items()}
+    baseline_memory = {r["size"]: r.get("bytes_per_node") for r in baseline["results"]}
+    regressions = []
+    for r in results["results"]:
+        before = baseline_memory.get(r["size"])
+        if before and r["bytes_per_node"]/before > threshold:
+            regressions.append(
+                f"{r['size']:<10}{'bytes/node':<18}{before:>10.0f} -> {r['bytes_per_node']:.0f} " +
+                f"(x{r['bytes_per_node']/before:.2f})")
+        for name, stats in r["operations"].items():
+            before = baseline_ops.get((r["size"], name))
+            if before is None or before == 0:
+                continue
+            ratio = stats["median_ms"]/before
+            if ratio > threshold:
+                regressions.append(
+                    f"{r['size']:<10}{name:<18}{before:>10.3f} -> {stats['median_ms']:.3f} ms " +
+                    f"(x{ratio:.2f})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("Usage")[0])
+    parser.add_argument("--sizes", nargs="+", default=["template", "1k", "10k"],
+                        choices=PRESETS.keys())
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--out", default=None, help="JSON file to write the results to")
+    parser.add_argument("--json", action="store_true", help="print the results as json")
+    parser.add_argument("--compare", default=None, help="JSON results of a baseline run")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "runs": args.runs,
+            "results": [bench_size(size, args.runs, directory) for size in args.sizes],
+        }
+
+    if args.out is not None:
+        with open(args.out, 'w') as f:
+            f.write(json.dumps(results, indent=4))
+    if args.json:
+        print(json.dumps(results, indent=4))
+    else:
+        print(f"{'size':<10}{'nodes':>7}  {'operation':<18}{'median ms':>11}{'min ms':>10}{'max ms':>10}")
+        for r in results["results"]:
+            print(f"{r['size']:<10}{r['nodes']:>7}  {'bytes/node':<18}{r['bytes_per_node']:>11.0f}")
+            if "page_html_peak_kb" in r:
+                print(f"{r['size']:<10}{r['nodes']:>7}  {'page peak kb':<18}{r['page_html_peak_kb']:>11.0f}")
+            for name, stats in r["operations"].items():
+                print(f"{r['size']:<10}{r['nodes']:>7}  {name:<18}{stats['median_ms']:>11.3f}"
+                      f"{stats['min_ms']:>10.3f}{stats['max_ms']:>10.3f}")
+
+    if args.compare is not None:
+        with open(args.compare, 'r') as f:
+            regressions = compare(results, json.loads(f.read()), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+File: preview_modes.py
+
+Description:
+    Compares the two preview paths of ResumeContent.as_images: the "pdf" mode
+(html -> Chromium pdf -> PyMuPDF raster -> PIL) and the "screenshot" mode
+(html -> Chromium page screenshots -> PIL).
+
+Usage (from the repository root):
+    python -m benchmark.preview_modes [resume_id] [--runs N]
+"""
+
+
+
+import argparse
+import json
+import statistics
+import time
+
+from src.browser_pool import BrowserPool
+from src.resume_content import ResumeContent
+
+
+
+def time_mode(content: ResumeContent, mode: str, runs: int) -> dict:
+    # one untimed call warms the pool up, then runs calls are timed.
+    pages = len(content.as_images(mode))
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        content.as_images(mode)
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "mode": mode,
+        "pages": pages,
+        "runs": runs,
+        "mean_ms": statistics.mean(samples),
+        "median_ms": statistics.median(samples),
+        "min_ms": min(samples),
+        "max_ms": max(samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("Usage")[0])
+    parser.add_argument("resume_id", nargs="?", default="template_0")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print the results as json")
+    args = parser.parse_args()
+
+    with BrowserPool(size=1) as pool:
+        content = ResumeContent(args.resume_id, pool)
+        results = [time_mode(content, mode, args.runs) for mode in ("pdf", "screenshot")]
+
+    if args.json:
+        print(json.dumps(results, indent=4))
+        return
+    print(f"{'mode':<12}{'pages':>6}{'mean ms':>10}{'median ms':>11}{'min ms':>9}{'max ms':>9}")
+    for r in results:
+        print(f"{r['mode']:<12}{r['pages']:>6}{r['mean_ms']:>10.1f}{r['median_ms']:>11.1f}"
+              f"{r['min_ms']:>9.1f}{r['max_ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
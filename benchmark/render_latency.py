@@ -0,0 +1,249 @@
+"""
+File: render_latency.py
+
+Description:
+    End-to-end benchmark of the preview path ResumeContent -> html -> Chromium
+pdf -> rasterized page images (ResumeContent.as_images), on saved resumes and on
+synthetic multi-page resumes (see synthetic.py). For each resume it reports:
+    cold        latency of the first render with a new Playwright, browser,
+                rasterizer and rasterizer worker processes (launches and
+                worker startup included),
+    warm        latency of later renders on the same browser, with the page
+                image cache cleared so every page is rasterized again,
+    throughput  full renders per minute with --jobs renders in flight,
+as well as p50/p95 of each, the time spent per stage (see render_trace.py), and
+the peak resident memory of Python, of Chromium, of the rasterizer workers and
+of the other child processes (Playwright's Node.js driver and the resource
+tracker of multiprocessing).
+
+    Runs offline once Chromium is installed (python -m playwright install
+chromium). Memory of child processes is read from /proc, so Linux only.
+
+Usage (from the repository root):
+    python -m benchmark.render_latency [--resumes template_0] [--synthetic 1k 10k]
+        [--cold-runs N] [--warm-runs N] [--jobs N] [--out results.json] [--json]
+"""
+
+
+
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.browser_pool import BrowserPool
+from src.rasterizer import PageRasterizer, shutdown_process_pool, worker_pids
+from src.render_loop import RenderLoop
+from src.render_trace import get_tracer
+from src.resume_content import ResumeContent
+from src.resume_content_tree import get_content_tree
+from benchmark.synthetic import PRESETS, synthetic_resume
+
+
+
+class MemorySampler:
+    '''
+    Samples the resident memory of the descendants of this process every
+    interval seconds, split between Chromium, the rasterizer worker processes
+    (see rasterizer.worker_pids) and the other processes.
+    '''
+    def __init__(self, interval: float = 0.05) -> None:
+        self.interval = interval
+        self.peak_chromium = 0
+        self.peak_workers = 0
+        self.peak_other = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.sample()
+            self.stopped.wait(self.interval)
+
+    def sample(self):
+        chromium, workers, other = 0, 0, 0
+        rasterizers = set(worker_pids())
+        for pid in descendants(os.getpid()):
+            rss = read_rss(pid)
+            if pid in rasterizers:
+                workers += rss
+            elif is_chromium(pid):
+                chromium += rss
+            else:
+                other += rss
+        self.peak_chromium = max(self.peak_chromium, chromium)
+        self.peak_workers = max(self.peak_workers, workers)
+        self.peak_other = max(self.peak_other, other)
+
+
+def descendants(pid: int) -> list[int]:
+    # returns the pids of all descendants of pid, from /proc.
+    children = dict()
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", 'r') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        ppid = int(stat.rsplit(')', 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+    found, stack = [], [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            found.append(child)
+            stack.append(child)
+    return found
+
+
+def read_rss(pid: int) -> int:
+    # returns the resident memory of pid in bytes (0 if it exited).
+    try:
+        with open(f"/proc/{pid}/status", 'r') as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])*1024
+    except OSError:
+        pass
+    return 0
+
+
+def is_chromium(pid: int) -> bool:
+    try:
+        with open(f"/proc/{pid}/cmdline", 'rb') as f:
+            command = f.read().split(b'\0')[0]
+    except OSError:
+        return False
+    name = os.path.basename(command).lower()
+    return b"chrom" in name or b"headless_shell" in name
+
+
+def summarize(samples: list[float]) -> dict:
+    # returns the run count and p50/p95/min/max of samples (ms).
+    if not samples:
+        return {"runs": 0}
+    if len(samples) == 1:
+        p50 = p95 = samples[0]
+    else:
+        quantiles = statistics.quantiles(samples, n=20, method="inclusive")
+        p50, p95 = quantiles[9], quantiles[18]
+    return {"runs": len(samples), "p50_ms": p50, "p95_ms": p95,
+            "min_ms": min(samples), "max_ms": max(samples)}
+
+
+def load_resume(resume_id: str) -> dict:
+    with open(f"resume/{resume_id}.json", 'r') as f:
+        return json.loads(f.read())
+
+
+def render_once(content: ResumeContent, rasterizer: PageRasterizer) -> int:
+    # renders content to page images without reusing cached pages.
+    #   Returns the number of pages.
+    rasterizer.clear()
+    keys, _ = rasterizer.rasterize(content.as_pdf)
+    return len(keys)
+
+
+def bench_resume(name: str, resume: dict, cold_runs: int, warm_runs: int, jobs: int) -> dict:
+    # measures the resume of dictionary resume.
+    result = {"resume": name}
+    tracer = get_tracer()
+    try:
+        with MemorySampler() as memory:
+            cold = []
+            for i in range(cold_runs):
+                shutdown_process_pool()
+                with RenderLoop(f"cold_{i}") as loop, BrowserPool(1, render_loop=loop) as pool:
+                    content = ResumeContent(name, pool, get_content_tree(resume))
+                    start = time.perf_counter()
+                    result["pages"] = render_once(content, PageRasterizer())
+                    cold.append((time.perf_counter() - start)*1000)
+
+            with RenderLoop("warm") as loop, BrowserPool(jobs, render_loop=loop) as pool:
+                content = ResumeContent(name, pool, get_content_tree(resume))
+                rasterizer = PageRasterizer()
+                render_once(content, rasterizer)
+                tracer.clear()
+                warm = []
+                for _ in range(warm_runs):
+                    start = time.perf_counter()
+                    render_once(content, rasterizer)
+                    warm.append((time.perf_counter() - start)*1000)
+                result["stages"] = tracer.summary()
+
+                renders = max(jobs*4, warm_runs)
+                start = time.perf_counter()
+                with ThreadPoolExecutor(jobs) as executor:
+                    list(executor.map(
+                        lambda i: render_once(content, PageRasterizer(workers=1)), range(renders)))
+                elapsed = time.perf_counter() - start
+        result["cold"] = summarize(cold)
+        result["warm"] = summarize(warm)
+        result["throughput"] = {
+            "jobs": jobs, "renders": renders, "renders_per_min": renders/elapsed*60}
+        result["peak_rss_mb"] = {
+            "chromium": memory.peak_chromium/2**20,
+            "workers": memory.peak_workers/2**20,
+            "other": memory.peak_other/2**20}
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}"
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("Usage")[0])
+    parser.add_argument("--resumes", nargs="*", default=["template_0"],
+                        help="ids of resumes saved in resume/")
+    parser.add_argument("--synthetic", nargs="*", default=["1k", "10k"],
+                        choices=PRESETS.keys(), help="synthetic resume sizes")
+    parser.add_argument("--cold-runs", type=int, default=3)
+    parser.add_argument("--warm-runs", type=int, default=20)
+    parser.add_argument("--jobs", type=int, default=2, help="renders in flight for throughput")
+    parser.add_argument("--out", default=None, help="JSON file to write the results to")
+    parser.add_argument("--json", action="store_true", help="print the results as json")
+    args = parser.parse_args()
+
+    targets = [(resume_id, load_resume(resume_id)) for resume_id in args.resumes]
+    targets += [(f"synthetic_{size}", synthetic_resume(size)) for size in args.synthetic]
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": [bench_resume(name, resume, args.cold_runs, args.warm_runs, args.jobs)
+                    for name, resume in targets],
+        "python_peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/2**10,
+    }
+
+    if args.out is not None:
+        with open(args.out, 'w') as f:
+            f.write(json.dumps(results, indent=4))
+    if args.json:
+        print(json.dumps(results, indent=4))
+        return
+    print(f"{'resume':<18}{'pages':>6}{'cold p50':>10}{'warm p50':>10}{'warm p95':>10}"
+          f"{'renders/min':>13}{'chromium MB':>13}")
+    for r in results["results"]:
+        if "error" in r:
+            print(f"{r['resume']:<18}  failed: {r['error']}")
+            continue
+        print(f"{r['resume']:<18}{r['pages']:>6}{r['cold']['p50_ms']:>10.1f}"
+              f"{r['warm']['p50_ms']:>10.1f}{r['warm']['p95_ms']:>10.1f}"
+              f"{r['throughput']['renders_per_min']:>13.1f}{r['peak_rss_mb']['chromium']:>13.1f}")
+    print(f"python peak rss: {results['python_peak_rss_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+File: synthetic.py
+
+Description:
+    Generates synthetic resumes, as the dictionaries get_content_tree reads, to
+benchmark the content tree at sizes from the template (~200 nodes) to tens of
+thousands of nodes. The output is deterministic for a given seed.
+
+    A resume is a Sequence of sections. Each section has a header, a line and
+entries; an entry has a title line, a 3-column table and a bulleted list, and
+holds 2 nested entries for every level of depth above 1. Any node is wrapped in
+a StyledFont (and Itemizations also in a BoxMargin) with probability
+decorator_density.
+
+Usage (from the repository root):
+    python -m benchmark.synthetic 10k resume/synthetic_10k.json
+"""
+
+
+
+import argparse
+import json
+import random
+
+
+
+WORDS = ["designed", "built", "scaled", "migrated", "optimized", "led", "shipped",
+         "service", "pipeline", "platform", "latency", "throughput", "cache", "api",
+         "python", "team", "customers", "reliability", "tests", "dashboard"]
+FONT_FAMILIES = ["Montserrat", "Arial", "Georgia"]
+FONT_SIZES = ["0.9em", "1em", "1.1em", "1.2em"]
+MARGINS = ["0px", "2px", "5px", "10px"]
+
+# keyword arguments of synthetic_resume for the benchmarked sizes.
+PRESETS = {
+    "template": dict(sections=3, entries=2, depth=1, bullets=2),
+    "1k": dict(sections=5, entries=5, depth=1, bullets=3),
+    "10k": dict(sections=8, entries=8, depth=2, bullets=4),
+    "30k": dict(sections=10, entries=10, depth=3, bullets=3),
+}
+
+
+
+class SyntheticResume:
+    '''
+    Generator of one synthetic resume (see the module description).
+    '''
+    def __init__(
+            self,
+            sections: int = 5,
+            entries: int = 3,
+            depth: int = 1,
+            bullets: int = 3,
+            decorator_density: float = 0.35,
+            seed: int = 0) -> None:
+        self.sections = sections
+        self.entries = entries
+        self.depth = depth
+        self.bullets = bullets
+        self.decorator_density = decorator_density
+        self.random = random.Random(seed)
+
+    @property
+    def as_dict(self) -> dict:
+        resume = self.node("Sequence", "Resume", [
+            self.section(i) for i in range(self.sections)])
+        return self.box_margin(self.styled_font(resume, force=True), force=True)
+
+    def words(self, n: int) -> str:
+        return " ".join(self.random.choice(WORDS) for _ in range(n))
+
+    def node(self, type: str, info: str = None, components: list = None, **attrs) -> dict:
+        node = {"type": type, "status": 1, "info": type if info is None else info}
+        if components is not None:
+            node["components"] = components
+        return node | attrs
+
+    def text(self, n: int = 4) -> dict:
+        return self.styled_font(self.node("TextElement", value=self.words(n)))
+
+    def url(self) -> dict:
+        return self.styled_font(self.node(
+            "URLElement", value=self.words(2),
+            url=f"https://example.com/{self.random.randrange(10**6)}"))
+
+    def styled_font(self, node: dict, force: bool = False) -> dict:
+        if not force and self.random.random() >= self.decorator_density:
+            return node
+        return self.node(
+            "StyledFont", component=node,
+            font_size=self.random.choice(FONT_SIZES),
+            font_family=self.random.choice(FONT_FAMILIES),
+            bold=int(self.random.random() < 0.5),
+            italic=int(self.random.random() < 0.2),
+            underline=0)
+
+    def box_margin(self, node: dict, force: bool = False) -> dict:
+        if not force and self.random.random() >= self.decorator_density:
+            return node
+        return self.node(
+            "BoxMargin", component=node,
+            **{f"margin_{side}": self.random.choice(MARGINS) for side in "nesw"})
+
+    def itemization(self, type: str, info: str = None, components: list = None, **attrs) -> dict:
+        return self.box_margin(self.styled_font(self.node(type, info, components, **attrs)))
+
+    def section(self, i: int) -> dict:
+        header = self.itemization("Header", None, [self.text(2)], level="2")
+        entries = [self.entry(f"Entry {i}.{j}", self.depth) for j in range(self.entries)]
+        return self.itemization(
+            "Sequence", f"Section {i}", [header, self.node("HLine")] + entries)
+
+    def entry(self, info: str, depth: int) -> dict:
+        title = self.itemization(
+            "TextLine", None, [self.text(3), self.node("TextElement", value=" - "), self.url()])
+        table = self.itemization(
+            "Tabular", None, [self.text(2) for _ in range(3)], table_width="3")
+        bullets = self.itemization(
+            "UnorderedList", None, [self.bullet() for _ in range(self.bullets)])
+        nested = [self.entry(f"{info}.{k}", depth-1) for k in range(2)] if depth > 1 else []
+        return self.itemization("Sequence", info, [title, table, bullets] + nested)
+
+    def bullet(self) -> dict:
+        skills = self.itemization("InlineList", None, [self.text(1) for _ in range(3)])
+        return self.itemization("TextLine", None, [self.text(8), skills])
+
+
+def synthetic_resume(preset: str = None, **args) -> dict:
+    # returns a synthetic resume of the given preset size, or built from args
+    #   (see SyntheticResume).
+    if preset is not None:
+        args = PRESETS[preset] | args
+    return SyntheticResume(**args).as_dict
+
+
+def count_nodes(content: dict) -> int:
+    # returns the number of nodes of a resume dictionary.
+    count = 0
+    stack = [content]
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(node.get("components", []))
+        if "component" in node:
+            stack.append(node["component"])
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Writes a synthetic resume.")
+    parser.add_argument("preset", choices=PRESETS.keys())
+    parser.add_argument("path", help="output JSON file, e.g. resume/synthetic_10k.json")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--decorator-density", type=float, default=0.35)
+    args = parser.parse_args()
+
+    content = synthetic_resume(
+        args.preset, seed=args.seed, decorator_density=args.decorator_density)
+    with open(args.path, 'w') as f:
+        f.write(json.dumps(content, indent=4))
+    print(f"Wrote {count_nodes(content)} nodes to {args.path}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+File: batch_export.py
+
+Description:
+    This module exports many resumes to pdf without the UI. The resumes are
+rendered concurrently through one shared BrowserPool, whose size bounds how many
+pages print at the same time, and the time and outcome of every file is reported.
+
+Usage (from the repository root):
+    python -m src.batch_export resume_0 "intern_*" --out exports --jobs 4
+"""
+
+
+
+import argparse
+import glob
+import json
+import os
+import os.path as osp
+import time
+
+from .browser_pool import BrowserPool
+from .resume_content import ResumeContent
+from .resume_content_tree import get_content_tree
+
+
+
+class ExportResult:
+    '''
+    The outcome of exporting one resume.
+    '''
+    def __init__(self, resume_id: str, path: str) -> None:
+        self.id = resume_id
+        self.path = path
+        self.load_time = 0.0
+        self.render_time = 0.0
+        self.error: Exception = None
+
+    def __str__(self) -> str:
+        if self.error is not None:
+            return f"{self.id}: failed ({self.error.__class__.__name__}: {self.error})"
+        return f"{self.id}: {self.path} (load {self.load_time*1000:.0f} ms, " + \
+            f"render {self.render_time*1000:.0f} ms)"
+
+    @property
+    def succeeded(self):
+        return self.error is None
+
+
+def resolve_ids(patterns: list[str], resume_dir: str = "resume") -> list[str]:
+    # expands ids and glob patterns (matched against resume_dir/<id>.json)
+    #   into a list of resume ids, in order and without duplicates.
+    ids = list()
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            paths = sorted(glob.glob(osp.join(resume_dir, f"{pattern}.json")))
+            matches = [osp.splitext(osp.basename(path))[0] for path in paths]
+        else:
+            matches = [pattern]
+        for resume_id in matches:
+            if resume_id not in ids:
+                ids.append(resume_id)
+    return ids
+
+
+async def render_resume(browser_pool: BrowserPool, html: str, path: str) -> float:
+    # prints html to path and returns the time spent on a page, excluding
+    #   the time waiting for one.
+    async with browser_pool.page() as page:
+        start = time.perf_counter()
+        await page.set_content(html)
+        await page.pdf(path=path)
+        return time.perf_counter() - start
+
+
+def export_resumes(
+        ids: list[str],
+        out_dir: str = None,
+        browser_pool: BrowserPool = None,
+        jobs: int = 4,
+        resume_dir: str = "resume") -> list[ExportResult]:
+    # exports resume_dir/<id>.json to out_dir/<id>.pdf (resume_dir/<id>.pdf if
+    #   out_dir is None) for every id. Uses browser_pool if given, otherwise a
+    #   pool of jobs pages that is closed afterwards.
+    own_pool = browser_pool is None
+    if own_pool:
+        browser_pool = BrowserPool(size=jobs)
+    if not out_dir is None:
+        os.makedirs(out_dir, exist_ok=True)
+
+    results = list()
+    futures = list()
+    try:
+        for resume_id in ids:
+            path = osp.join(resume_dir if out_dir is None else out_dir, f"{resume_id}.pdf")
+            result = ExportResult(resume_id, path)
+            results.append(result)
+            try:
+                start = time.perf_counter()
+                # read here rather than by ResumeContent, which only looks in
+                #   resume/ and creates a template for a missing file
+                with open(osp.join(resume_dir, f"{resume_id}.json"), 'r') as f:
+                    tree = get_content_tree(json.loads(f.read()))
+                content = ResumeContent(resume_id, browser_pool, tree)
+                html = content.as_html
+                result.load_time = time.perf_counter() - start
+            except Exception as e:
+                result.error = e
+                continue
+            futures.append(
+                (result, browser_pool.submit(render_resume(browser_pool, html, path))))
+
+        for result, future in futures:
+            try:
+                result.render_time = future.result()
+            except Exception as e:
+                result.error = e
+    finally:
+        if own_pool:
+            browser_pool.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exports resumes to pdf.")
+    parser.add_argument("ids", nargs="+", help="resume ids or glob patterns of ids")
+    parser.add_argument("--dir", default="resume", help="directory of the resume files")
+    parser.add_argument("--out", default=None, help="output directory (default: --dir)")
+    parser.add_argument("--jobs", type=int, default=4, help="pages printing at the same time")
+    args = parser.parse_args()
+
+    ids = resolve_ids(args.ids, args.dir)
+    start = time.perf_counter()
+    results = export_resumes(ids, args.out, jobs=args.jobs, resume_dir=args.dir)
+    elapsed = time.perf_counter() - start
+
+    for result in results:
+        print(result)
+    succeeded = sum(result.succeeded for result in results)
+    print(f"Exported {succeeded}/{len(results)} resume(s) in {elapsed:.1f} s " + \
+          f"({succeeded/elapsed*60 if elapsed > 0 else 0:.1f} resumes/min).")
+
+
+if __name__ == "__main__":
+    main()
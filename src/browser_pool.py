@@ -0,0 +1,244 @@
+"""
+File: browser_pool.py
+
+Description:
+    This module contains the BrowserPool class, which keeps Chromium (through
+Playwright) alive between renders. A bounded number of pages are checked out for
+each render and recycled afterwards, so a steady-state render only costs
+set_content + pdf instead of a full browser launch.
+"""
+
+
+
+import asyncio
+import atexit
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
+
+from .render_loop import RenderLoop, get_render_loop
+from .render_trace import get_tracer
+
+
+
+# returns the offsets at which a laid out document of pageHeight pages breaks,
+#   from 0 to its height. Like print, a page ends above a line of text or an
+#   image that would be cut, unless it starts the page.
+PAGE_BREAKS_JS = """
+(pageHeight) => {
+    const boxes = [];
+    const range = document.createRange();
+    const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+    while (walker.nextNode()) {
+        range.selectNodeContents(walker.currentNode);
+        for (const rect of range.getClientRects()) {
+            boxes.push([rect.top + window.scrollY, rect.bottom + window.scrollY]);
+        }
+    }
+    for (const image of document.images) {
+        const rect = image.getBoundingClientRect();
+        boxes.push([rect.top + window.scrollY, rect.bottom + window.scrollY]);
+    }
+    const end = Math.ceil(document.documentElement.scrollHeight);
+    const breaks = [0];
+    let top = 0;
+    while (top + pageHeight < end) {
+        let next = top + pageHeight;
+        for (const [boxTop, boxBottom] of boxes) {
+            if (boxTop > top && boxTop < next && boxBottom > next) {
+                next = boxTop;
+            }
+        }
+        top = Math.floor(next);
+        breaks.push(top);
+    }
+    breaks.push(end);
+    return breaks;
+}
+"""
+
+
+class PageSlot:
+    '''
+    A browser context and its page, owned by a BrowserPool.
+    '''
+    def __init__(self, browser, context, page) -> None:
+        self.browser = browser
+        self.context = context
+        self.page = page
+        self.uses = 0
+
+    @property
+    def usable(self):
+        return self.browser.is_connected() and not self.page.is_closed()
+
+    async def close(self):
+        try:
+            await self.context.close()
+        except Exception:
+            pass
+
+
+
+class BrowserPool:
+    '''
+    A size-bounded pool of Chromium pages.
+
+    The browser and its pages live on a RenderLoop (the shared one by default),
+    and every render, from the Tk main thread, the preview thread or headless
+    code, is submitted to that loop.
+    '''
+    def __init__(
+            self,
+            size: int = 2,
+            max_uses: int = 200,
+            render_loop: RenderLoop = None) -> None:
+        if render_loop is None:
+            render_loop = get_render_loop()
+        self.size = size
+        self.max_uses = max_uses
+        self.render_loop = render_loop
+        self.browser = None
+        self.reset()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def reset(self):
+        self.browser_lock = asyncio.Lock()
+        self.semaphore = asyncio.Semaphore(self.size)
+        self.idle: list[PageSlot] = []
+
+    def close(self):
+        # closes every page and the browser. The pool relaunches it if used again.
+        if self.render_loop.running:
+            self.render_loop.run(self.shutdown())
+        self.render_loop.remove_shutdown_hook(self.shutdown)
+
+    def submit(self, coroutine, key: str = None) -> Future:
+        # schedules coroutine on the render loop (see RenderLoop.submit).
+        return self.render_loop.submit(coroutine, key)
+
+    def submit_pdf(self, html: str, path: str = None, key: str = None) -> Future:
+        return self.submit(self.render_pdf(html, path), key)
+
+    def submit_screenshots(self, html: str, width: int, height: int, key: str = None) -> Future:
+        return self.submit(self.render_screenshots(html, width, height), key)
+
+    def print_pdf(self, html: str, path: str = None) -> bytes:
+        # renders html to a pdf (saved to path if given) and returns its bytes.
+        return self.submit_pdf(html, path).result()
+
+    def screenshot_pages(self, html: str, width: int, height: int) -> list[bytes]:
+        # renders html and returns png screenshots of its pages, width x height
+        #   or scaled alike (see render_screenshots).
+        return self.submit_screenshots(html, width, height).result()
+
+    async def render_pdf(self, html: str, path: str = None) -> bytes:
+        tracer = get_tracer()
+        async with self.page() as page:
+            with tracer.span("set_content"):
+                await page.set_content(html)
+            with tracer.span("page.pdf"):
+                return await page.pdf(path=path)
+
+    async def render_screenshots(self, html: str, width: int, height: int) -> list[bytes]:
+        # lays html out in print media, then captures the document one page at
+        #   a time. As in print, a document wider than the page (e.g. its body)
+        #   is laid out at its own width, with pages scaled to keep their
+        #   width x height proportions, and pages break between lines (see
+        #   PAGE_BREAKS_JS), so the last ones may be shorter than a page.
+        async with self.page() as page:
+            await page.set_viewport_size({"width": width, "height": height})
+            await page.emulate_media(media="print")
+            await page.set_content(html)
+            layout_width = await page.evaluate(
+                "document.documentElement.scrollWidth")
+            if layout_width > width:
+                height = round(height*layout_width/width)
+                width = layout_width
+                await page.set_viewport_size({"width": width, "height": height})
+            breaks = await page.evaluate(PAGE_BREAKS_JS, height)
+            screenshots = []
+            for top, bottom in zip(breaks, breaks[1:]):
+                with get_tracer().span("page.screenshot"):
+                    screenshots.append(await page.screenshot(
+                        clip={"x": 0, "y": top, "width": width, "height": max(bottom-top, 1)},
+                        full_page=True))
+            return screenshots
+
+    @asynccontextmanager
+    async def page(self):
+        # checks out a page for the duration of the block.
+        #   Must be used from the render loop.
+        slot = await self.checkout()
+        succeeded = False
+        try:
+            yield slot.page
+            succeeded = True
+        finally:
+            await self.checkin(slot, succeeded)
+
+    async def checkout(self) -> PageSlot:
+        await self.semaphore.acquire()
+        try:
+            while self.idle:
+                slot = self.idle.pop()
+                if slot.usable:
+                    return slot
+                await slot.close()
+            return await self.new_slot()
+        except BaseException:
+            self.semaphore.release()
+            raise
+
+    async def checkin(self, slot: PageSlot, succeeded: bool = True):
+        # returns slot to the pool, or recycles it if it failed or got old.
+        slot.uses += 1
+        if succeeded and slot.uses < self.max_uses and slot.usable:
+            self.idle.append(slot)
+        else:
+            await slot.close()
+        self.semaphore.release()
+
+    async def new_slot(self) -> PageSlot:
+        browser = await self.get_browser()
+        context = await browser.new_context()
+        page = await context.new_page()
+        return PageSlot(browser, context, page)
+
+    async def get_browser(self):
+        # returns the pool's browser, (re)launching it if needed.
+        async with self.browser_lock:
+            if self.browser is None or not self.browser.is_connected():
+                with get_tracer().span("browser_launch"):
+                    playwright = await self.render_loop.get_playwright()
+                    self.browser = await playwright.chromium.launch()
+                self.render_loop.add_shutdown_hook(self.shutdown)
+            return self.browser
+
+    async def shutdown(self):
+        for slot in self.idle:
+            await slot.close()
+        if self.browser is not None:
+            try:
+                await self.browser.close()
+            except Exception:
+                pass
+            self.browser = None
+        self.reset()
+
+
+
+default_pool: BrowserPool = None
+
+def get_default_pool() -> BrowserPool:
+    # returns the pool shared by ResumeContent objects created without one,
+    #   which is closed when the interpreter exits.
+    global default_pool
+    if default_pool is None:
+        default_pool = BrowserPool()
+        atexit.register(default_pool.close)
+    return default_pool
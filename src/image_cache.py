@@ -0,0 +1,82 @@
+"""
+File: image_cache.py
+
+Description:
+    This module contains the ImageCache class, a least recently used cache of
+PIL images bounded by the memory of their pixels, with hit/miss counters.
+"""
+
+
+
+import threading
+from collections import OrderedDict
+from typing import Callable
+from PIL import Image
+
+
+
+class ImageCache:
+    '''
+    An LRU cache of images. The least recently used images are evicted once the
+    pixels of the cached images exceed max_bytes.
+    '''
+    def __init__(self, max_bytes: int = 64*2**20) -> None:
+        self.max_bytes = max_bytes
+        self.images: OrderedDict[object, Image.Image] = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.images)
+
+    def __str__(self) -> str:
+        return f"ImageCache({len(self)} images, {self.size}/{self.max_bytes} bytes, " + \
+            f"hits={self.hits}, misses={self.misses})"
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits/lookups if lookups else 0.0
+
+    def image_bytes(self, image: Image.Image) -> int:
+        return image.width*image.height*len(image.getbands())
+
+    def get(self, key):
+        # returns the image of key (None if absent) and marks it recently used.
+        with self.lock:
+            image = self.images.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.images.move_to_end(key)
+            return image
+
+    def put(self, key, image: Image.Image):
+        # caches image under key, evicting least recently used images as
+        #   needed. Images larger than max_bytes are not cached.
+        size = self.image_bytes(image)
+        with self.lock:
+            if key in self.images:
+                self.size -= self.image_bytes(self.images.pop(key))
+            if size > self.max_bytes:
+                return
+            self.images[key] = image
+            self.size += size
+            while self.size > self.max_bytes:
+                _, evicted = self.images.popitem(last=False)
+                self.size -= self.image_bytes(evicted)
+
+    def get_or_create(self, key, create: Callable[[], Image.Image]) -> Image.Image:
+        image = self.get(key)
+        if image is None:
+            image = create()
+            self.put(key, image)
+        return image
+
+    def clear(self):
+        with self.lock:
+            self.images = OrderedDict()
+            self.size = 0
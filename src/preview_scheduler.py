@@ -0,0 +1,102 @@
+"""
+File: preview_scheduler.py
+
+Description:
+    This module contains the PreviewScheduler class, which runs preview renders
+in a background thread when they are requested rather than on a timer. Requests
+are debounced (a render starts once no request came for quiet_time seconds) and
+coalesced: at most one render runs at a time, and requests made while it runs
+lead to a single render of the newest state afterwards. A render that raises
+is reported and the scheduler keeps serving requests, so a failure (e.g. a
+crashed browser, which BrowserPool recovers from) does not end the preview.
+"""
+
+
+
+import threading
+import time
+import traceback
+from typing import Callable
+
+
+
+class PreviewScheduler:
+    '''
+    Debounced, latest-wins scheduling of a render function.
+
+    render() is called from the scheduler's thread. It may return a delay in
+    seconds after which it wants to run again (e.g. a full quality pass),
+    which is dropped if a new request arrives first. The thread stops once
+    running() returns False, then calls on_stop() if given.
+    '''
+    def __init__(
+            self,
+            render: Callable[[], float|None],
+            running: Callable[[], bool],
+            quiet_time: float = 0.3,
+            poll_time: float = 0.5,
+            on_stop: Callable[[], None] = None) -> None:
+        self.render = render
+        self.running = running
+        self.on_stop = on_stop
+        self.quiet_time = quiet_time
+        self.poll_time = poll_time
+        self.condition = threading.Condition()
+        self.due_time: float = None
+        self.thread: threading.Thread = None
+        self.renders = 0
+        self.failures = 0
+
+    def start(self) -> threading.Thread:
+        self.thread = threading.Thread(target=self.run, name="preview_scheduler")
+        self.thread.start()
+        return self.thread
+
+    def request(self, delay: float = None):
+        # asks for a render once delay (quiet_time by default) seconds passed
+        #   without another request.
+        if delay is None:
+            delay = self.quiet_time
+        with self.condition:
+            self.due_time = time.monotonic() + delay
+            self.condition.notify()
+
+    def request_later(self, delay: float):
+        # asks for a render after delay seconds, unless one is already pending.
+        with self.condition:
+            if self.due_time is None:
+                self.due_time = time.monotonic() + delay
+                self.condition.notify()
+
+    def wait_due(self) -> bool:
+        # waits until a requested render is due. Returns False if the
+        #   scheduler stopped running meanwhile. Wakes up every poll_time
+        #   seconds to check running().
+        with self.condition:
+            while self.running():
+                if self.due_time is None:
+                    self.condition.wait(self.poll_time)
+                    continue
+                remaining = self.due_time - time.monotonic()
+                if remaining <= 0:
+                    self.due_time = None
+                    return True
+                self.condition.wait(min(remaining, self.poll_time))
+            return False
+
+    def run(self):
+        try:
+            while self.wait_due():
+                try:
+                    delay = self.render()
+                except Exception:
+                    self.failures += 1
+                    print(f"Preview render failed ({self.failures} so far):")
+                    traceback.print_exc()
+                    continue
+                self.renders += 1
+                if delay is not None:
+                    self.request_later(delay)
+        finally:
+            if self.on_stop is not None:
+                self.on_stop()
@@ -0,0 +1,220 @@
+"""
+File: rasterizer.py
+
+Description:
+    This module contains the PageRasterizer class, which turns pdf bytes into PIL
+images page by page. Every page is identified by a hash of its content stream,
+and the images of pages that did not change since the previous call are reused
+instead of being rasterized again. When several pages changed, they are
+rasterized in parallel by a shared pool of worker processes. Pages can be
+rasterized at any zoom (1 is 72 dpi), e.g. a cheap low resolution draft first,
+or straight at the width they are displayed at, optionally in grayscale.
+Images wrap the pixmap buffers without copying: pages are rasterized in
+grayscale or RGBA, the layouts PIL can share.
+"""
+
+
+
+import atexit
+import hashlib
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import pymupdf
+from PIL import Image
+
+from .render_trace import get_tracer
+
+
+
+def page_key(page: pymupdf.Page) -> str:
+    # returns a digest of what is drawn on the page.
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(tuple(page.rect)).encode())
+    digest.update(page.read_contents())
+    return digest.hexdigest()
+
+
+def get_pixmap(page: pymupdf.Page, zoom: float = 1, width: int = None, gray: bool = False):
+    # rasterizes page at zoom (1 is 72 dpi), or at the zoom making it width
+    #   pixels wide if width is given, in grayscale or RGBA. Colors get an
+    #   alpha channel since PIL shares RGBA buffers but copies RGB ones; what
+    #   the pdf leaves unpainted is transparent.
+    if width is not None:
+        zoom = width/page.rect.width
+    colorspace = pymupdf.csGRAY if gray else pymupdf.csRGB
+    return page.get_pixmap(
+        matrix=pymupdf.Matrix(zoom, zoom), colorspace=colorspace, alpha=not gray)
+
+
+def pixmap_mode(n: int) -> str:
+    # returns the PIL mode of a pixmap with n components (alpha included).
+    return {1: "L", 2: "LA", 3: "RGB", 4: "RGBA"}[n]
+
+
+def buffer_image(mode: str, width: int, height: int, buffer, owner = None) -> tuple[Image.Image, int]:
+    # returns an image over buffer and the number of bytes copied to make it.
+    #   PIL shares the buffer of "L" and "RGBA" samples (see get_pixmap) and
+    #   copies other modes once. owner is kept alive with the image.
+    image = Image.frombuffer(mode, (width, height), buffer, "raw", mode, 0, 1)
+    if image.readonly:
+        image.buffer_owner = owner if owner is not None else buffer
+        return image, 0
+    return image, len(buffer)
+
+
+def rasterize_page(
+        page: pymupdf.Page,
+        zoom: float = 1,
+        width: int = None,
+        gray: bool = False) -> tuple[Image.Image, int]:
+    # returns the image of page and the number of bytes copied to make it.
+    pix = get_pixmap(page, zoom, width, gray)
+    return buffer_image(pixmap_mode(pix.n), pix.width, pix.height, pix.samples_mv, pix)
+
+
+def rasterize_pages(
+        pdf: bytes,
+        page_numbers: list[int],
+        zoom: float = 1,
+        width: int = None,
+        gray: bool = False) -> list[tuple[int, str, int, int, bytes]]:
+    # opens pdf and returns (page_number, mode, width, height, samples) for
+    #   each page in page_numbers. Runs in the worker processes.
+    with pymupdf.open(stream=pdf, filetype="pdf") as document:
+        rasters = list()
+        for page_number in page_numbers:
+            pix = get_pixmap(document[page_number], zoom, width, gray)
+            rasters.append(
+                (page_number, pixmap_mode(pix.n), pix.width, pix.height, pix.samples))
+        return rasters
+
+
+process_pool: ProcessPoolExecutor = None
+process_pool_lock = threading.Lock()
+
+def get_process_pool() -> ProcessPoolExecutor:
+    # returns the worker processes shared by all rasterizers, which are shut
+    #   down when the interpreter exits. Workers are spawned rather than
+    #   forked since the application runs Tk and the browser pool in threads.
+    global process_pool
+    with process_pool_lock:
+        if process_pool is None:
+            process_pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count(),
+                mp_context=multiprocessing.get_context("spawn"))
+            atexit.register(process_pool.shutdown, cancel_futures=True)
+        return process_pool
+
+
+def shutdown_process_pool():
+    # shuts the worker processes down; the next get_process_pool spawns new
+    #   ones (e.g. to measure a cold start).
+    global process_pool
+    with process_pool_lock:
+        if process_pool is not None:
+            process_pool.shutdown(cancel_futures=True)
+            process_pool = None
+
+
+def worker_pids() -> list[int]:
+    # returns the pids of the running worker processes (none before the
+    #   first parallel rasterization).
+    with process_pool_lock:
+        if process_pool is None:
+            return []
+        return list((process_pool._processes or dict()).keys())
+
+
+
+class PageRasterizer:
+    '''
+    Rasterizes pdf pages, keeping the images of the last rasterized document
+    for each of the max_settings most recently used (zoom, width, gray).
+
+    workers is the largest number of processes a single document is split
+    across; with workers <= 1, pages are rasterized in the calling thread.
+    '''
+    def __init__(self, workers: int = os.cpu_count(), max_settings: int = 4) -> None:
+        self.workers = workers
+        self.max_settings = max_settings
+        self.caches: OrderedDict[tuple, dict[str, Image.Image]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.rasterized = 0
+        self.reused = 0
+        self.bytes_copied = 0
+
+    def rasterize(
+            self,
+            pdf: bytes,
+            zoom: float = 1,
+            width: int = None,
+            gray: bool = False) -> tuple[list[str], list[Image.Image]]:
+        # returns the keys and images of the pages of pdf, rasterized at zoom,
+        #   or width pixels wide if width is given. Only pages whose key is
+        #   not in the cache of these settings are rasterized. Keys differ
+        #   between settings. Sets bytes_copied to the bytes copied from
+        #   pixmaps to images during this call.
+        settings = (zoom, width, gray)
+        span = get_tracer().span("rasterize", zoom=zoom, width=width, gray=gray)
+        with span, self.lock, pymupdf.open(stream=pdf, filetype="pdf") as document:
+            previous = self.caches.pop(settings, dict())
+            cache = dict()
+            keys, images = list(), list()
+            missing = list()
+            for page in document:
+                key = f"{page_key(page)}@{zoom}:{width}:{int(gray)}"
+                image = cache.get(key, previous.get(key))
+                if image is None:
+                    missing.append(page.number)
+                else:
+                    self.reused += 1
+                    cache[key] = image
+                keys.append(key)
+                images.append(image)
+
+            if len(missing) > 1 and self.workers > 1:
+                rasters = self.rasterize_in_workers(pdf, missing, zoom, width, gray)
+            else:
+                rasters = [(n, *rasterize_page(document[n], zoom, width, gray))
+                           for n in missing]
+            self.bytes_copied = 0
+            for page_number, image, copied in rasters:
+                self.bytes_copied += copied
+                key = keys[page_number]
+                image = cache.setdefault(key, image)
+                images[page_number] = image
+            self.rasterized += len(missing)
+            span.args["pages"] = len(keys)
+            span.args["rasterized"] = len(missing)
+            self.caches[settings] = cache
+            while len(self.caches) > self.max_settings:
+                self.caches.popitem(last=False)
+            return keys, images
+
+    def rasterize_in_workers(
+            self,
+            pdf: bytes,
+            page_numbers: list[int],
+            zoom: float = 1,
+            width: int = None,
+            gray: bool = False) -> list:
+        # splits page_numbers round-robin over the worker processes. Returns
+        #   (page_number, image, bytes copied) for each page.
+        chunk_count = min(self.workers, len(page_numbers))
+        chunks = [page_numbers[i::chunk_count] for i in range(chunk_count)]
+        pool = get_process_pool()
+        futures = [pool.submit(rasterize_pages, pdf, chunk, zoom, width, gray)
+                   for chunk in chunks]
+        rasters = list()
+        for future in futures:
+            for page_number, mode, pix_width, pix_height, samples in future.result():
+                rasters.append(
+                    (page_number, *buffer_image(mode, pix_width, pix_height, samples)))
+        return rasters
+
+    def clear(self):
+        with self.lock:
+            self.caches = OrderedDict()
@@ -0,0 +1,143 @@
+"""
+File: render_loop.py
+
+Description:
+    This module contains the RenderLoop class, a background thread running one
+persistent asyncio event loop and the Playwright instance used by every render.
+Renders are submitted from any thread and come back as futures that can be
+waited on, awaited from another event loop, cancelled, or coalesced by key so
+only the latest render of a kind is kept.
+"""
+
+
+
+import asyncio
+import atexit
+import threading
+from concurrent.futures import Future
+from typing import Callable
+from playwright.async_api import async_playwright
+
+
+
+class RenderLoop:
+    '''
+    A persistent event loop thread owning Playwright.
+
+    Playwright objects can only be used from the loop that created them, so
+    everything touching them (see BrowserPool) runs as coroutines submitted here.
+    '''
+    def __init__(self, name: str = "render_loop") -> None:
+        self.name = name
+        self.loop: asyncio.AbstractEventLoop = None
+        self.thread: threading.Thread = None
+        self.lock = threading.Lock()
+        self.playwright = None
+        self.playwright_lock: asyncio.Lock = None
+        self.pending: dict[str, Future] = dict()
+        self.shutdown_hooks: list[Callable] = list()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def running(self):
+        return self.loop is not None
+
+    def start(self):
+        with self.lock:
+            if self.loop is not None:
+                return
+            self.playwright_lock = asyncio.Lock()
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(
+                target=self.loop.run_forever, name=self.name, daemon=True)
+            self.thread.start()
+
+    def close(self):
+        # runs the shutdown hooks, stops Playwright, then stops the loop.
+        #   The loop starts again on the next submit.
+        with self.lock:
+            if self.loop is None:
+                return
+            loop, thread = self.loop, self.thread
+            self.loop, self.thread = None, None
+            pending = list(self.pending.values())
+            self.pending = dict()
+        for future in pending:
+            future.cancel()
+        try:
+            asyncio.run_coroutine_threadsafe(self.shutdown(), loop).result()
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+    def submit(self, coroutine, key: str = None) -> Future:
+        # schedules coroutine on the loop and returns a concurrent.futures.Future
+        #   of its result. Submitting with the key of a render that is not done
+        #   yet cancels that render (latest wins).
+        self.start()
+        with self.lock:
+            previous = self.pending.get(key) if key is not None else None
+            future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+            if key is not None:
+                self.pending[key] = future
+        if previous is not None:
+            previous.cancel()
+        if key is not None:
+            future.add_done_callback(lambda f: self.forget(key, f))
+        return future
+
+    def run(self, coroutine, key: str = None):
+        # submits coroutine and waits for its result.
+        return self.submit(coroutine, key).result()
+
+    def forget(self, key: str, future: Future):
+        with self.lock:
+            if self.pending.get(key) is future:
+                del self.pending[key]
+
+    def add_shutdown_hook(self, hook: Callable):
+        # registers a coroutine function awaited on the loop before Playwright
+        #   stops, e.g. to close browsers.
+        if hook not in self.shutdown_hooks:
+            self.shutdown_hooks.append(hook)
+
+    def remove_shutdown_hook(self, hook: Callable):
+        if hook in self.shutdown_hooks:
+            self.shutdown_hooks.remove(hook)
+
+    async def get_playwright(self):
+        # returns the Playwright instance, starting it on first use.
+        async with self.playwright_lock:
+            if self.playwright is None:
+                self.playwright = await async_playwright().start()
+            return self.playwright
+
+    async def shutdown(self):
+        for hook in list(self.shutdown_hooks):
+            try:
+                await hook()
+            except Exception:
+                pass
+        if self.playwright is not None:
+            await self.playwright.stop()
+            self.playwright = None
+
+
+
+default_render_loop: RenderLoop = None
+
+def get_render_loop() -> RenderLoop:
+    # returns the render loop shared by browser pools created without one,
+    #   which is closed when the interpreter exits.
+    global default_render_loop
+    if default_render_loop is None:
+        default_render_loop = RenderLoop()
+        atexit.register(default_render_loop.close)
+    return default_render_loop
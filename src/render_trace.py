@@ -0,0 +1,158 @@
+"""
+File: render_trace.py
+
+Description:
+    This module contains the RenderTracer class, which times the stages of the
+render pipeline (html generation, browser launch, pdf printing, rasterization,
+resizing and loading images into Tk). Every span adds its duration to a rolling
+window per stage, from which percentiles are reported. Spans can also be kept
+as Chrome trace events and dumped to a JSON file that chrome://tracing or
+https://ui.perfetto.dev opens.
+
+    The shared tracer (get_tracer) records trace events when the environment
+variable DREAMCRAFT_TRACE is set to a file path, and dumps them there on exit:
+    DREAMCRAFT_TRACE=trace.json python main.py
+"""
+
+
+
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+
+
+
+class Span:
+    '''
+    A timed block of a RenderTracer, used as a context manager.
+    '''
+    def __init__(self, tracer, name: str, args: dict) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.record(self.name, self.start, time.perf_counter_ns(), self.args)
+
+
+
+class RenderTracer:
+    '''
+    Stage timings of the render pipeline.
+
+    Only the last window durations of each stage are kept. Trace events are
+    only kept while recording, up to max_events (the oldest are dropped).
+    '''
+    def __init__(
+            self,
+            window: int = 256,
+            recording: bool = False,
+            max_events: int = 100000) -> None:
+        self.window = window
+        self.recording = recording
+        self.enabled = True
+        self.durations: dict[str, deque] = dict()
+        self.counts: dict[str, int] = dict()
+        self.events: deque = deque(maxlen=max_events)
+        self.thread_names: dict[int, str] = dict()
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter_ns()
+
+    def span(self, name: str, **args) -> Span:
+        # returns a context manager timing its block as stage name. args are
+        #   attached to the trace event.
+        return Span(self, name, args)
+
+    def record(self, name: str, start: int, end: int, args: dict = None):
+        # adds a span of stage name from start to end (perf_counter_ns).
+        if not self.enabled:
+            return
+        durations = self.durations.get(name)
+        if durations is None:
+            with self.lock:
+                durations = self.durations.setdefault(name, deque(maxlen=self.window))
+        durations.append(end - start)
+        self.counts[name] = self.counts.get(name, 0) + 1
+        if self.recording:
+            thread = threading.current_thread()
+            self.thread_names[thread.ident] = thread.name
+            self.events.append(
+                (name, start, end, thread.ident, args))
+
+    def percentiles(self, name: str, percents = (50, 95, 99)) -> dict:
+        # returns the given percentiles (nearest rank) of the recent durations
+        #   of stage name, in milliseconds.
+        durations = sorted(self.durations.get(name, ()))
+        if not durations:
+            return {p: None for p in percents}
+        n = len(durations)
+        return {p: durations[min(n - 1, max(0, math.ceil(p*n/100) - 1))]/1e6
+                for p in percents}
+
+    def summary(self) -> dict:
+        # returns the count and recent p50/p95/max (ms) of every stage.
+        summary = dict()
+        for name in sorted(self.durations.keys()):
+            percentiles = self.percentiles(name, (50, 95, 100))
+            summary[name] = {
+                "count": self.counts.get(name, 0),
+                "p50_ms": percentiles[50],
+                "p95_ms": percentiles[95],
+                "max_ms": percentiles[100]}
+        return summary
+
+    def __str__(self) -> str:
+        lines = [f"{'stage':<20}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}"]
+        for name, stats in self.summary().items():
+            lines.append(f"{name:<20}{stats['count']:>8}{stats['p50_ms']:>10.2f}" +
+                         f"{stats['p95_ms']:>10.2f}{stats['max_ms']:>10.2f}")
+        return "\n".join(lines)
+
+    def trace_events(self) -> list[dict]:
+        # returns the recorded spans in the Chrome trace event format.
+        pid = os.getpid()
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in list(self.thread_names.items())]
+        for name, start, end, tid, args in list(self.events):
+            events.append({
+                "name": name, "cat": "render", "ph": "X", "pid": pid, "tid": tid,
+                "ts": (start - self.origin)/1e3, "dur": (end - start)/1e3,
+                "args": args or {}})
+        return events
+
+    def dump_trace(self, path: str):
+        with open(path, 'w') as f:
+            json.dump({"traceEvents": self.trace_events(), "displayTimeUnit": "ms"}, f)
+
+    def clear(self):
+        with self.lock:
+            self.durations = dict()
+            self.counts = dict()
+            self.events.clear()
+
+
+
+default_tracer: RenderTracer = None
+
+def get_tracer() -> RenderTracer:
+    # returns the tracer shared by the render pipeline. It records trace
+    #   events if DREAMCRAFT_TRACE is set, and dumps them there on exit.
+    global default_tracer
+    if default_tracer is None:
+        trace_path = os.environ.get("DREAMCRAFT_TRACE")
+        default_tracer = RenderTracer(recording=bool(trace_path))
+        if trace_path:
+            atexit.register(default_tracer.dump_trace, trace_path)
+    return default_tracer
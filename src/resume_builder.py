@@ -9,8 +9,10 @@ with relevant functions for ResumeContent and GraphicalUserInterface classes.
 
 from .ui import GraphicalUserInterface
 from .resume_content import ResumeContent
+from .browser_pool import BrowserPool
+from .render_loop import RenderLoop
+from .preview_scheduler import PreviewScheduler
 import asyncio
-import threading
 import time
 import random
 import tkinter as tk
@@ -19,10 +21,31 @@ import tkinter as tk
 
 class ResumeBuilder:
 
-    def __init__(self, ui: GraphicalUserInterface) -> None:
+    def __init__(
+            self,
+            ui: GraphicalUserInterface,
+            preview_mode: str = "pdf",
+            progressive: bool = True,
+            draft_zoom: float = 0.5,
+            idle_time: float = 1,
+            grayscale: bool = False,
+            quiet_time: float = 0.3) -> None:
         self.ui = ui
         self.content = None
         self.current_state = 'start'
+        self.preview_mode = preview_mode
+        self.progressive = progressive
+        self.draft_zoom = draft_zoom
+        self.idle_time = idle_time
+        self.grayscale = grayscale
+        self.quiet_time = quiet_time
+        self.preview_ratio = 1.1
+        self.frame_bytes_copied = 0
+        self.preview_scheduler = None
+        self.preview_state = None
+        self.render_loop = RenderLoop()
+        self.browser_pool = BrowserPool(size=2, render_loop=self.render_loop)
+        self.ui.push_exit_handler(self.render_loop.close)
 
         self.open_main_page()
 
@@ -66,7 +89,7 @@ class ResumeBuilder:
         id = self.ui.read_text(
             self.ui.get_widget(
                 self.main_page_tag, 'main_resume_id'))
-        self.content = ResumeContent(id)
+        self.content = ResumeContent(id, self.browser_pool)
         self.draw_workspace()
         self.start_content_display()
     
@@ -230,18 +253,83 @@ class ResumeBuilder:
         
         
     def start_content_display(self):
-        t = threading.Thread(target=self.content_display)
-        t.start()
-        self.ui.push_thread(t)
+        # renders the preview when the content is edited or the window is
+        #   resized, once no such event came for quiet_time seconds. Idle
+        #   sessions do not render at all.
+        self.preview_state = dict(
+            version=None, fingerprint=None, modified_time=time.monotonic(),
+            pdf=None, raster_width=None, displayed_width=None,
+            keys=None, images=None, raster_bytes_copied=0)
+        content = self.content
+        def request(*args):
+            scheduler.request()
+        def stop():
+            content.unsubscribe(request)
+            self.ui.remove_resize_handler(request)
+        scheduler = PreviewScheduler(
+            self.update_preview,
+            lambda: self.current_state == self.workspace_state and \
+                self.content is content and self.ui.get_state != 'exit',
+            self.quiet_time,
+            on_stop=stop)
+        content.subscribe(request)
+        self.ui.push_resize_handler(request)
+        self.preview_scheduler = scheduler
+        scheduler.request(0)
+        self.ui.push_thread(scheduler.start())
 
         
-    def content_display(self, time_sep=5):
-        while self.current_state == self.workspace_state:
-            images = self.content.as_images()
-            if self.ui.get_state == 'exit':
-                break
-            self.ui.load_images(self.workspace_tag_2, images, 1.1)
-            time.sleep(time_sep)
+    def update_preview(self):
+        # brings the preview up to date, skipping renders while the content
+        #   version or its html is unchanged. The html is rendered once per
+        #   version, for both its fingerprint and the print. In pdf mode, pages
+        #   are rasterized at the preview width, so a resized window triggers a
+        #   new raster rather than a resize of the images. When progressive, a
+        #   change is first rasterized at draft_zoom of that width, and the
+        #   returned delay asks for the full width pass once the content stayed
+        #   unmodified for idle_time seconds. frame_bytes_copied is set to the pixel bytes
+        #   copied (pixmaps to images to Tk) for the last displayed frame.
+        #   The version and fingerprint are stored once rendered, so a failed
+        #   render is tried again on the next call. An edit that leaves the html
+        #   unchanged neither renders nor restarts the draft.
+        state = self.preview_state
+        version = self.content.version
+        if version != state['version']:
+            html = self.content.as_html
+            fingerprint = self.content.html_fingerprint(html)
+            if fingerprint != state['fingerprint']:
+                state['modified_time'] = time.monotonic()
+                if self.preview_mode == "pdf":
+                    state['pdf'] = self.content.print_pdf(html)
+                    state['raster_width'] = None
+                else:
+                    state['keys'], state['images'] = \
+                        self.content.as_page_images(self.preview_mode, html=html)
+                    state['displayed_width'] = None
+                state['fingerprint'] = fingerprint
+            state['version'] = version
+        if self.ui.get_state == 'exit':
+            return None
+        width = int(self.ui.get_canvas_width(self.workspace_tag_2)*self.preview_ratio)
+        idle = time.monotonic()-state['modified_time']
+        drafting = self.progressive and idle < self.idle_time
+        if state['pdf'] is not None:
+            target_width = max(int(width*self.draft_zoom) if drafting else width, 1)
+            if target_width != state['raster_width']:
+                state['keys'], state['images'] = self.content.rasterize(
+                    state['pdf'], width=target_width, gray=self.grayscale)
+                state['raster_bytes_copied'] = self.content.rasterizer.bytes_copied
+                state['raster_width'] = target_width
+                state['displayed_width'] = None
+        if width != state['displayed_width']:
+            tk_bytes_copied = self.ui.load_images(
+                self.workspace_tag_2, state['images'], self.preview_ratio, state['keys'])
+            self.frame_bytes_copied = state['raster_bytes_copied'] + tk_bytes_copied
+            state['raster_bytes_copied'] = 0
+            state['displayed_width'] = width
+        if drafting and state['pdf'] is not None:
+            return self.idle_time - idle
+        return None
         
 
     def import_pdf(self):
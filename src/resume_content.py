@@ -10,22 +10,57 @@ and import the pdf.
 
 
 import asyncio
-from playwright.async_api import async_playwright
+import hashlib
+import io
 import os
 import os.path as osp
 import json
-import pymupdf
+import threading
 from PIL import Image
 
 from .ui import *
 from .resume_content_tree import *
+from .browser_pool import BrowserPool, get_default_pool
+from .rasterizer import PageRasterizer
+from .render_trace import get_tracer
 
 
 
 class ResumeContent:
-    def __init__(self, resume_id = "resume_0") -> None:
+    # letter size at 96 css pixels per inch, as printed by Chromium.
+    PAGE_WIDTH = 816
+    PAGE_HEIGHT = 1056
+    HTML_HEADER = '''
+<!DOCTYPE html><html><head><title>My Resume</title>
+    <style>
+        body {
+            height: 816px;
+            width: 1056px;
+            margin: 0px, 0px, 0px, 0px
+        }
+    </style></head>
+    '''
+
+    def __init__(
+            self,
+            resume_id = "resume_0",
+            browser_pool: BrowserPool = None,
+            content: ContentTreeNode = None) -> None:
+        # loads resume/<resume_id>.json, unless a content tree is given.
         self.id = resume_id
-        self.content = self.load()
+        if browser_pool is None:
+            browser_pool = get_default_pool()
+        self.browser_pool = browser_pool
+        self.rasterizer = PageRasterizer()
+        self.screenshot_cache = dict()
+        if content is None:
+            content = self.load()
+        self.content = content
+        self.content.mark_clean()
+        self.node_index: NodeIndex = None
+        # the html segments are compiled and cached on the nodes while they
+        #   are rendered, so renders from several threads take turns.
+        self.render_lock = threading.Lock()
     
     def __str__(self) -> str:
         return f"Resume id: {self.id}\n\n{self.content.__str__()}"
@@ -40,50 +75,169 @@ class ResumeContent:
         return {"content": self.content.as_dict}
     
     @property
-    def as_markdown(self) -> dict:
-        # returns the dictionary of the class contents
-        return self.content.as_markdown
+    def as_markdown(self) -> str:
+        # returns the markdown of the resume, written from the same compiled
+        #   html pieces as as_html (see ContentTreeNode.write_markdown).
+        markdown = []
+        with self.render_lock:
+            self.content.write_markdown(markdown.append)
+        return "".join(markdown)
     
     @property
-    def as_html(self) -> dict:
-        # returns the dictionary of the class contents
-        header = '''
-<!DOCTYPE html><html><head><title>My Resume</title>
-    <style>
-        body {
-            height: 816px;
-            width: 1056px;
-            margin: 0px, 0px, 0px, 0px
-        }
-    </style></head>
-    '''
-        return f"{header}<body>{self.content.as_html}</body>"
+    def as_html(self) -> str:
+        # returns the html page of the resume, joined once from the html
+        #   pieces of the content (see ContentTreeNode.html_segment).
+        with get_tracer().span("as_html"):
+            with self.render_lock:
+                html = self.content.html_pieces([self.HTML_HEADER, "<body>"])
+            html.append("</body>")
+            return "".join(html)
+
+    def write_html(self, write):
+        # writes the html page of the resume chunk by chunk to write.
+        write(self.HTML_HEADER)
+        write("<body>")
+        with self.render_lock:
+            self.content.write_html(write)
+        write("</body>")
+
+    def to_html(self, path: str = None) -> str:
+        # writes the html page of the resume to path (resume/<id>.html by
+        #   default) without building it in memory. Returns the path.
+        if path is None:
+            path = f"{self.content_path}.html"
+        with get_tracer().span("to_html"):
+            with open(path, 'w') as f:
+                self.write_html(f.write)
+        return path
+    
+    @property
+    def version(self) -> int:
+        # increases on every modification of the content tree.
+        return self.content.version
+    
+    @property
+    def modified(self) -> bool:
+        # whether the content changed since it was loaded or saved.
+        return self.content.dirty
+    
+    @property
+    def index(self) -> NodeIndex:
+        # returns the index of the content's nodes by id (see NodeIndex),
+        #   built on first use and kept up to date afterwards.
+        if self.node_index is None:
+            self.node_index = NodeIndex(self.content)
+        return self.node_index
+
+    def subscribe(self, listener):
+        # calls listener(node) whenever a node of the content is modified.
+        return self.content.subscribe(listener)
+    
+    def unsubscribe(self, listener):
+        self.content.unsubscribe(listener)
+    
+    @property
+    def fingerprint(self) -> str:
+        # returns a digest of the rendered html, which changes iff the output does.
+        return self.html_fingerprint(self.as_html)
+
+    @staticmethod
+    def html_fingerprint(html: str) -> str:
+        # same as fingerprint, for html already rendered by as_html.
+        return hashlib.blake2b(html.encode(), digest_size=16).hexdigest()
     
     def to_pdf(self, path:str = None):
         # import the pdf version of the resume
-        asyncio.run(self.import_pdf(path))
+        if path is None:
+            path = f"{self.content_path}.pdf"
+        html = self.as_html
+        with get_tracer().span("print_pdf"):
+            self.browser_pool.print_pdf(html, path)
     
     async def import_pdf(self, path: str = None) -> None:
-        async with async_playwright() as p:
-            if path is None:
-                path = f"{self.content_path}.pdf"
-            browser = await p.chromium.launch()
-            page = await browser.new_page()
-            await page.set_content(self.as_html)
-            await page.pdf(path=path)
-            await browser.close()
+        # same as to_pdf, but awaitable from the caller's event loop.
+        if path is None:
+            path = f"{self.content_path}.pdf"
+        await asyncio.wrap_future(self.submit_pdf(path))
     
 
-    def as_images(self) -> list:
-        path = 'temp/temp.pdf'
-        self.to_pdf(path)
-        content_pdf = pymupdf.open(path)
-        images = list()
-        for page in content_pdf:
-            pix = page.get_pixmap()
-            image = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    @property
+    def as_pdf(self) -> bytes:
+        # returns the pdf version of the resume, rendered in memory.
+        return self.print_pdf()
+
+    def print_pdf(self, html: str = None) -> bytes:
+        # same as as_pdf, printing html (as_html by default) so that a caller
+        #   that already rendered the html does not render it again.
+        if html is None:
+            html = self.as_html
+        with get_tracer().span("print_pdf"):
+            return self.browser_pool.print_pdf(html)
+
+    def submit_pdf(self, path: str = None, key: str = None):
+        # starts rendering the pdf (saved to path if given) without waiting and
+        #   returns a future of its bytes. A newer submit with the same key
+        #   cancels this render if it is not done yet.
+        return self.browser_pool.submit_pdf(self.as_html, path, key)
+
+    def as_images(self, mode: str = "pdf") -> list:
+        # returns the pages of the resume as PIL images. The "pdf" mode
+        #   rasterizes the printed pdf, while the "screenshot" mode captures
+        #   the laid out page directly, skipping pdf generation.
+        return self.as_page_images(mode)[1]
+
+    def as_page_images(
+            self,
+            mode: str = "pdf",
+            zoom: float = 1,
+            html: str = None) -> tuple[list[str], list]:
+        # same as as_images, but also returns a key per page that only
+        #   changes when the page does. Unchanged pages reuse their image.
+        #   zoom scales the raster of the "pdf" mode (1 is 72 dpi). html, if
+        #   given, is the already rendered as_html.
+        if mode == "screenshot":
+            return self.as_screenshots(html)
+        return self.rasterize(self.print_pdf(html), zoom)
+
+    def rasterize(
+            self,
+            pdf: bytes,
+            zoom: float = 1,
+            width: int = None,
+            gray: bool = False) -> tuple[list[str], list]:
+        # returns the page keys and images of pdf, a rendered pdf of the resume
+        #   (see PageRasterizer.rasterize).
+        return self.rasterizer.rasterize(pdf, zoom, width, gray)
+
+    def as_screenshots(self, html: str = None) -> tuple[list[str], list]:
+        if html is None:
+            html = self.as_html
+        with get_tracer().span("screenshot_pages"):
+            screenshots = self.browser_pool.screenshot_pages(
+                html, self.PAGE_WIDTH, self.PAGE_HEIGHT)
+        keys, images = list(), list()
+        cache = dict()
+        for png in screenshots:
+            key = hashlib.blake2b(png, digest_size=16).hexdigest()
+            image = cache.get(key, self.screenshot_cache.get(key))
+            if image is None:
+                image = self.screenshot_page(png)
+            cache[key] = image
+            keys.append(key)
             images.append(image)
-        return images
+        self.screenshot_cache = cache
+        return keys, images
+
+    def screenshot_page(self, png: bytes) -> Image.Image:
+        # returns the image of a page screenshot, padded with white to the
+        #   proportions of a page when the page broke early (as in print).
+        image = Image.open(io.BytesIO(png)).convert("RGB")
+        height = round(image.width*self.PAGE_HEIGHT/self.PAGE_WIDTH)
+        if image.height < height:
+            page = Image.new("RGB", (image.width, height), "white")
+            page.paste(image)
+            image = page
+        return image
 
     
     def load(self, path = None):
@@ -102,6 +256,7 @@ class ResumeContent:
             os.makedirs(os.path.dirname(path), exist_ok=True)
         with open(path, 'w') as f:
             f.write(json.dumps(self.content.as_dict, indent=4))
+        self.content.mark_clean()
 
 
     def create_template(self) -> ContentTreeNode:
@@ -190,8 +345,9 @@ class ResumeContent:
     
     def sample_section_template(self, section_name: str):
         samples = Sequence({"info": "Samples"})
-        samples.insert(self.sample_template())
-        samples.insert(self.sample_template())
+        sample = self.sample_template()
+        samples.insert(sample)
+        samples.insert(sample.clone())
 
         section = self.section_header_template(section_name)
         section.insert(samples.decorated(
@@ -26,9 +26,27 @@ Classes:
             StyledFont
             BoxMargin
 
+    NodeIndex
+
+    Markup
+        Tag
+            BoxTag
+            BoxEndTag
+    HiddenCell
+
+    The tree is compiled into a flat render IR that the html and the markdown
+backends both read in one pass: a list of strings holding the text and the
+markup of the nodes, with the styles of the decorators resolved and the
+disabled nodes left out. Markup whose markdown differs from its html is a Tag,
+and HiddenCell stands for what only the markdown has. Each Sequence caches the
+segment of the IR below it until the tree below changes (see html_segment), so
+an edit compiles only the Sequences above the modified node again. The html is
+the strings joined (html_pieces, write_html); write_markdown writes the
+markdown of each string instead.
 """
 
 
+import itertools
 import sys
 import tkinter as tk
 from typing import Callable
@@ -36,18 +54,101 @@ from functools import partial
 from .ui import GraphicalUserInterface
 
 
+# how many nodes html_emit renders by recursion. The nodes below are left in
+#   the segment and rendered from the explicit stack of html_pieces, so that
+#   deep trees do not hit the recursion limit.
+HTML_DEPTH = 64
+
+
+class Markup(str):
+    '''
+    Fixed markup of the nodes (closing tags, list and table markup and
+    separators), as opposed to the text of the elements. Its markdown is the
+    same string. Adjacent Markup is joined into one (see add_markup).
+    '''
+    __slots__ = ()
+
+
+class Tag(Markup):
+    '''
+    Markup whose markdown differs from its html, e.g. the opening tag of a
+    StyledFont, whose markdown has the font style only. Tags are not joined
+    to the markup around them. The markdown is kept by html in Tag.markdown
+    (a str subclass cannot have slots of its own), so the Tags with the same
+    html have the same markdown.
+    '''
+    __slots__ = ()
+    markdown: dict[str, str] = dict()
+
+    def __new__(cls, html: str, markdown: str = ""):
+        tag = super().__new__(cls, html)
+        Tag.markdown[tag] = markdown
+        return tag
+
+
+class BoxTag(Tag):
+    '''
+    Opening tag of a BoxMargin. The markdown of the box is quoted up to the
+    matching BoxEndTag (see write_markdown_pieces).
+    '''
+    __slots__ = ()
+
+
+class BoxEndTag(Tag):
+    '''
+    Closing tag of a BoxMargin.
+    '''
+    __slots__ = ()
+
+
+class HiddenCell(str):
+    '''
+    A hidden cell of a Tabular, which has no html but keeps its markdown (see
+    Tabular.html_content).
+    '''
+    def __new__(cls, node):
+        cell = super().__new__(cls, "")
+        cell.node = node
+        return cell
+
+
 class ContentTreeNode:
     '''
     Base class for tree nodes.
     '''
     DECORATORS = ['StyledFont', 'BoxMargin']
+    # node classes by name, filled as subclasses are defined.
+    registry: dict[str, type] = dict()
+    # per-class metadata, shared by the instances.
+    decorator_type = ()
+    # slots holding the content of the node (status, info and the class
+    #   attributes such as value or font_size), copied by clone. Set for
+    #   every subclass from its __slots__.
+    fields = ('status', 'info')
+    __slots__ = ('parent', 'status', 'info', 'temp_values', 'version', 'clean_version',
+                 'listeners', 'html', 'html_version', 'markdown', 'markdown_version',
+                 'node_id')
 
     def __init__(self, content: dict = None, parent = None) -> None:
         self.parent:ContentTreeNode = parent
         self.status = content.get("status", 1)
-        self.info = content.get("info", self.class_name)
-        self.temp = dict()
-        self.decorator_type = []
+        self.info = intern(content.get("info", self.class_name))
+        self.temp_values: dict = None
+        self.version = 0
+        self.clean_version = 0
+        self.listeners: list[Callable] = None
+        self.node_id: int = None
+        self.html: tuple = None
+        self.html_version = -1
+        self.markdown: str = None
+        self.markdown_version = -1
+
+    def __init_subclass__(cls, **args) -> None:
+        super().__init_subclass__(**args)
+        ContentTreeNode.registry[cls.__name__] = cls
+        cls.fields = cls.__base__.fields + tuple(
+            name for name in cls.__dict__.get('__slots__', ())
+            if not name in ('components', 'component'))
 
     def __str__(self) -> str:
         return f"ContentGraphNode()"
@@ -56,6 +157,14 @@ class ContentTreeNode:
     def class_name(self):
         return self.__class__.__name__
 
+    @property
+    def temp(self) -> dict:
+        # editor state of the node (e.g. whether it is expanded), created on
+        #   first use.
+        if self.temp_values is None:
+            self.temp_values = dict()
+        return self.temp_values
+
     @property
     def as_dict(self):
         return {
@@ -66,17 +175,162 @@ class ContentTreeNode:
 
     @property
     def as_html(self) -> str:
-        pass
+        # returns the html of the subtree, joined once from its html_pieces.
+        return "".join(self.html_pieces())
 
     @property
     def as_markdown(self) -> str:
+        # same as as_html, for the markdown of get_markdown.
+        version = self.version
+        if self.markdown_version != version:
+            self.markdown = self.get_markdown()
+            self.markdown_version = version
+        return self.markdown
+
+    def get_html(self) -> str:
+        return "".join(self.html_pieces())
+
+    def get_markdown(self) -> str:
+        pass
+
+    def html_segment(self) -> tuple:
+        # returns the html of self as a tuple of runs (tuples of strings) and
+        #   of the nodes whose html goes in between: the Sequences, which
+        #   cache their own segments (see Sequence.html_segment), and the
+        #   nodes more than HTML_DEPTH levels down. The strings are shared
+        #   with the nodes, not copied.
+        segment = []
+        run = []
+        self.html_content(segment, run, 0)
+        if run:
+            segment.append(tuple(run))
+        return tuple(segment)
+
+    def html_emit(self, segment: list, run: list, depth: int):
+        # appends the html of self, below a node depth levels up, to run, or
+        #   self to segment if it is too deep to be rendered by recursion.
+        if depth < HTML_DEPTH:
+            self.html_content(segment, run, depth)
+        else:
+            if run:
+                segment.append(tuple(run))
+                run.clear()
+            segment.append(self)
+
+    def html_content(self, segment: list, run: list, depth: int):
+        # appends the html of self to run (see html_emit).
         pass
+
+    def html_pieces(self, pieces: list = None) -> list:
+        # appends the html of the subtree to pieces (a new list by default)
+        #   string by string, from the segments of self and of the segmented
+        #   nodes below. Returns pieces.
+        if pieces is None:
+            pieces = []
+        stack = [iter(self.html_segment())]
+        while stack:
+            for item in stack[-1]:
+                if item.__class__ is tuple:
+                    pieces += item
+                else:
+                    stack.append(iter(item.html_segment()))
+                    break
+            else:
+                stack.pop()
+        return pieces
+
+    def write_html(self, write: Callable):
+        # writes the html of the subtree to write string by string, without
+        #   joining it.
+        for html in self.html_pieces():
+            write(html)
+
+    def write_markdown(self, write: Callable):
+        # writes the markdown of the subtree to write, from the same pieces
+        #   as write_html (see write_markdown_pieces).
+        write_markdown_pieces(self.html_pieces(), write)
             
     def getattr(self, name:str):
         return getattr(self, name)
 
     def setattr(self, name:str, value:any):
-        return setattr(self, name, value)
+        setattr(self, name, value)
+        if name != 'parent':
+            self.mark_modified()
+
+    @property
+    def dirty(self):
+        # whether the subtree changed since the last mark_clean.
+        return self.version != self.clean_version
+
+    def mark_clean(self):
+        self.clean_version = self.version
+
+    def mark_modified(self):
+        # bumps the version of self and all its ancestors, then notifies
+        #   their listeners with the modified node, so that no listener sees
+        #   an ancestor that is not bumped yet.
+        cur = self
+        while not cur is None:
+            cur.version += 1
+            cur = cur.parent
+        cur = self
+        while not cur is None:
+            if cur.listeners:
+                for listener in tuple(cur.listeners):
+                    listener(self)
+            cur = cur.parent
+
+    def clone(self):
+        # returns a deep copy of the subtree of self, detached (no parent,
+        #   listeners or editor state). Nodes are copied slot by slot from an
+        #   explicit stack instead of through as_dict and get_content_tree,
+        #   and keep the markdown fragments cached by the original (html
+        #   segments refer to the original nodes and are built again).
+        def copy(node):
+            cls = node.__class__
+            new = cls.__new__(cls)
+            for name in cls.fields:
+                setattr(new, name, getattr(node, name))
+            new.parent = None
+            new.temp_values = None
+            new.version = 0
+            new.clean_version = 0
+            new.listeners = None
+            new.node_id = None
+            new.html = None
+            new.html_version = -1
+            fresh = node.markdown_version == node.version
+            new.markdown = node.markdown if fresh else None
+            new.markdown_version = 0 if fresh else -1
+            return new
+
+        root = copy(self)
+        stack = [(self, root)]
+        while stack:
+            node, new = stack.pop()
+            if isinstance(node, Itemization):
+                new.components = [copy(component) for component in node.components]
+                for component in new.components:
+                    component.parent = new
+                stack.extend(zip(node.components, new.components))
+            elif isinstance(node, Decorator):
+                new.component = copy(node.component)
+                new.component.parent = new
+                stack.append((node.component, new.component))
+        return root
+
+    def subscribe(self, listener: Callable):
+        # registers listener(node), called whenever node in the subtree of
+        #   self is modified.
+        if self.listeners is None:
+            self.listeners = list()
+        self.listeners.append(listener)
+        return listener
+
+    def unsubscribe(self, listener: Callable):
+        if self.listeners and listener in self.listeners:
+            self.listeners.remove(listener)
 
     def draw_editor(
             self,
@@ -512,9 +766,31 @@ class ContentTreeNode:
         return structure
 
     def get_bottom_component(self):
-        cur = self
-        while cur.class_name in self.DECORATORS:
-            cur = cur.component
+        # returns the node under the decorators of self (see Decorator).
+        return self
+
+    def get_node(self, path: str|list):
+        # returns the (bottom) node at path below self. path is a list, or a
+        #   '/'-separated string, of segments; a segment is a component index
+        #   or the info of a component (the first match is taken). Decorators
+        #   are skipped, e.g. "Experience/Samples/0".
+        if isinstance(path, str):
+            path = [segment for segment in path.split('/') if segment != '']
+        cur = self.get_bottom_component()
+        for segment in path:
+            components = getattr(cur, 'components', [])
+            if isinstance(segment, int) or segment.isdigit():
+                idx = int(segment)
+                if not 0 <= idx < len(components):
+                    raise KeyError(f"{cur.info} has no component {segment}")
+                cur = components[idx].get_bottom_component()
+                continue
+            for component in components:
+                if component.get_bottom_component().info == segment:
+                    cur = component.get_bottom_component()
+                    break
+            else:
+                raise KeyError(f"{cur.info} has no component {segment}")
         return cur
 
     
@@ -524,8 +800,69 @@ class ContentTreeNode:
     def pop(self):
         pass
 
-    def pre_order(self):
-        pass
+    @property
+    def children(self) -> list:
+        # the nodes directly below self (components of Itemizations, the
+        #   component of Decorators).
+        return ()
+
+    def iter_pre_order(self, types = None, status: int = None):
+        # yields the nodes of the subtree in pre-order, without recursion.
+        #   types (class names or classes) and status only filter the yielded
+        #   nodes, the whole subtree is walked. Nodes are visited as they are
+        #   yielded, unlike pre_order which lists them all first.
+        filtered = not (types is None and status is None)
+        stack = [self]
+        pop, extend = stack.pop, stack.extend
+        while stack:
+            node = pop()
+            if not filtered or node_matches(node, types, status):
+                yield node
+            children = node.children
+            if children:
+                extend(children[::-1])
+
+    def iter_post_order(self, types = None, status: int = None):
+        # same as iter_pre_order, in post-order.
+        stack = [(self, False)]
+        while stack:
+            node, visited = stack.pop()
+            if visited:
+                if node_matches(node, types, status):
+                    yield node
+                continue
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(node.children))
+
+    def pre_order(self) -> list:
+        # returns the nodes of the subtree in pre-order.
+        order = []
+        stack = [self]
+        pop, push, extend = stack.pop, order.append, stack.extend
+        while stack:
+            node = pop()
+            push(node)
+            children = node.children
+            if children:
+                extend(children[::-1])
+        return order
+
+    @property
+    def path(self) -> list[int]:
+        # returns the component indices leading from the root to the (bottom)
+        #   node of self, i.e. root.get_node(node.path) is node.
+        path = []
+        cur = self.get_bottom_component()
+        while not cur.parent is None:
+            parent = cur.parent
+            if not parent.class_name in self.DECORATORS:
+                for i, component in enumerate(parent.components):
+                    if component is cur:
+                        path.append(i)
+                        break
+            cur = parent
+        path.reverse()
+        return path
 
 
 
@@ -533,6 +870,7 @@ class Element(ContentTreeNode):
     '''
     Base class for elements (tree leaves).
     '''
+    __slots__ = ()
 
     def __init__(self, content: dict = None, parent = None) -> None:
         super().__init__(content, parent)
@@ -540,9 +878,6 @@ class Element(ContentTreeNode):
     def __str__(self) -> str:
         return f"Element(status={self.status})"
     
-    def pre_order(self):
-        return [self]
-
 
     
 class HLine(Element):
@@ -552,6 +887,9 @@ class HLine(Element):
     content's key:
         None
     '''
+    __slots__ = ()
+    rule = Tag('<hr style="margin-left:-20px;margin-right:40px;">', '---')
+
     def __init__(self, content: dict = dict(), parent = None) -> None:
         super().__init__(content, parent)
 
@@ -562,14 +900,11 @@ class HLine(Element):
     def as_dict(self):
         return super().as_dict
     
-    @property
-    def as_html(self):
-        if self.status == 0:
-            return ""
-        return f'<hr style="margin-left:-20px;margin-right:40px;">'
+    def html_content(self, segment, run, depth):
+        if self.status == 1:
+            add_markup(run, self.rule)
     
-    @property
-    def as_markdown(self):
+    def get_markdown(self):
         if self.status == 0:
             return ""
         return '---'
@@ -630,10 +965,12 @@ class TextElement(Element):
     content's key:
         "value"
     '''
+    decorator_type = ("StyledFont",)
+    __slots__ = ('value',)
+
     def __init__(self, content: dict = dict(), parent = None) -> None:
         super().__init__(content, parent)
         self.value: str = content.get("value", "")
-        self.decorator_type = ["StyledFont"]
 
     def  __str__(self):
         return f'TextElement("{self.value}", status={self.status})'
@@ -644,14 +981,13 @@ class TextElement(Element):
             "value": self.value,
         }
     
-    @property
-    def as_html(self):
-        if self.status == 0:
-            return ""
-        return self.value
+    def html_emit(self, segment, run, depth):
+        if self.status == 1:
+            run.append(self.value)
+
+    html_content = html_emit
     
-    @property
-    def as_markdown(self):
+    def get_markdown(self):
         if self.status == 0:
             return ""
         return self.as_html
@@ -731,11 +1067,14 @@ class URLElement(Element):
         "value"
         "url"
     '''
+    decorator_type = ("StyledFont",)
+    __slots__ = ('value', 'url')
+    close_tag = Markup("</a>")
+
     def __init__(self, content: dict = dict(), parent = None) -> None:
         super().__init__(content, parent)
         self.value: str = content.get("value", "")
         self.url: str = content.get("url", "")
-        self.decorator_type = ["StyledFont"]
 
     def __str__(self):
         return f'URLItem("{self.value}", "{self.url}", status={self.status})'
@@ -747,14 +1086,14 @@ class URLElement(Element):
             "url": self.url,
         }
     
-    @property
-    def as_html(self):
-        if self.status == 0:
-            return ""
-        return f'<a href="{self.url}">{self.value}</a>'
+    def html_emit(self, segment, run, depth):
+        if self.status == 1:
+            run += ('<a href="', self.url, '">', self.value)
+            add_markup(run, self.close_tag)
 
-    @property
-    def as_markdown(self):
+    html_content = html_emit
+
+    def get_markdown(self):
         if self.status == 0:
             return ""
         return self.as_html
@@ -826,16 +1165,26 @@ class Itemization(ContentTreeNode):
     content's key:
         "components"
     '''
-    def __init__(self, content: dict = dict(), parent = None) -> None:
+    decorator_type = ("StyledFont", "BoxMargin")
+    attrs = ()
+    insert_type = ()
+    __slots__ = ('components',)
+
+    def __init__(
+            self,
+            content: dict = dict(),
+            parent = None,
+            components: list = None) -> None:
+        # components, if given, are the already built nodes to use instead
+        #   of those of content (see get_content_tree).
         super().__init__(content, parent)
-        self.components: list[ContentTreeNode] = [
-            get_content_tree(CGLeaf) for CGLeaf in content.get("components", list())
-            ]
+        if components is None:
+            components = [
+                get_content_tree(CGLeaf) for CGLeaf in content.get("components", list())
+                ]
+        self.components: list[ContentTreeNode] = components
         for component in self.components:
             component.setattr('parent',self)
-        self.decorator_type = ["StyledFont", "BoxMargin"]
-        self.attrs = []
-        self.insert_type = []
         
     def __str__(self):
         return f"Itemization([{self.components_str}, status={self.status}])"
@@ -846,14 +1195,13 @@ class Itemization(ContentTreeNode):
             "components": [component.as_dict for component in self.components],
         }
     
-    @property
-    def as_html(self):
-        if self.status == 0:
-            return ""
-        return f"{''.join(component.as_html for component in self.components)}"
+    def html_content(self, segment, run, depth):
+        if self.status == 1:
+            depth += 1
+            for component in self.components:
+                component.html_emit(segment, run, depth)
 
-    @property
-    def as_markdown(self):
+    def get_markdown(self):
         if self.status == 0:
             return ""
         return f"{''.join(component.as_markdown for component in self.components)}"
@@ -1079,22 +1427,27 @@ class Itemization(ContentTreeNode):
         else:
             self.components.insert(idx, component)
         component.setattr('parent',self)
+        self.mark_modified()
     
     def insert_clone(self, idx: int):
         # inserts a copy of component self.components[idx] to idx.
         #   Insert to the back if idx is None.
-        clone = get_content_tree(self.components[idx].as_dict)
+        clone = self.components[idx].clone()
         self.components.insert(idx, clone)
+        clone.setattr('parent',self)
+        self.mark_modified()
     
     def remove(self, component: ContentTreeNode, reset_parent = True):
         self.components.remove(component)
         if reset_parent:
             component.setattr('parent',None)
+        self.mark_modified()
     
     def pop(self, idx: int, reset_parent = True):
         component = self.components.pop(idx)
         if reset_parent:
             component.setattr('parent',None)
+        self.mark_modified()
         return component
 
     def replace(self, component1: ContentTreeNode, component2: ContentTreeNode):
@@ -1106,12 +1459,11 @@ class Itemization(ContentTreeNode):
         # swaps self.components[idx1] and self.components[idx2]
         self.components[idx1], self.components[idx2] = \
             self.components[idx2], self.components[idx1]
+        self.mark_modified()
     
-    def pre_order(self):
-        po = [self]
-        for component in self.components:
-            po += component.pre_order()
-        return po
+    @property
+    def children(self):
+        return self.components
 
 
 class Sequence(Itemization):
@@ -1121,25 +1473,47 @@ class Sequence(Itemization):
     content's key:
         "components"
     '''
-
-    def __init__(self, content: dict = dict(), parent = None) -> None:
-        super().__init__(content, parent)
-        self.insert_type = ['HLine', 'Sequence', 'Header', 'TextLine', 'UnorderedList']
+    insert_type = ('HLine', 'Sequence', 'Header', 'TextLine', 'UnorderedList')
+    __slots__ = ()
+    separator = Markup("\n")
 
     def __str__(self):
         return f"Sequence([{self.components_str}, status={self.getattr('status')}])"
 
 
-    @property
-    def as_html(self):
-        if self.getattr('status') == 0:
-            return ""
-        return f"{'\n'.join(component.as_html for component in self.components
-                            if component.get_bottom_component().getattr('status')==1)}"
+    def html_segment(self):
+        # the segment of a Sequence is cached until its version changes,
+        #   i.e. until a node of its subtree is modified, so an edit only
+        #   renders the Sequences above the modified node again. The version
+        #   is read first, so that an edit made meanwhile leaves the segment
+        #   out of date.
+        version = self.version
+        if self.html_version != version:
+            self.html = super().html_segment()
+            self.html_version = version
+        return self.html
+
+    def html_emit(self, segment, run, depth):
+        if run:
+            segment.append(tuple(run))
+            run.clear()
+        segment.append(self)
+
+    def html_content(self, segment, run, depth):
+        if self.status == 0:
+            return
+        depth += 1
+        separator = None
+        for component in self.components:
+            if component.get_bottom_component().status == 1:
+                if separator:
+                    add_markup(run, separator)
+                else:
+                    separator = self.separator
+                component.html_emit(segment, run, depth)
 
 
-    @property
-    def as_markdown(self):
+    def get_markdown(self):
         if self.status == 0:
             return ""
         return f"{'\n'.join(component.as_markdown for component in self.components
@@ -1154,24 +1528,16 @@ class TextLine(Itemization):
     content's key:
         "components"
     '''
-    def __init__(self, content: dict = dict(), parent = None) -> None:
-        super().__init__(content, parent)
-        self.insert_type = ['TextElement', 'URLElement', 'InlineList']
+    insert_type = ('TextElement', 'URLElement', 'InlineList')
+    __slots__ = ()
     
     def __str__(self):
         return f"TextLine([{self.components_str}, status={self.status}])"
     
-    @property
-    def as_html(self):
+    def get_markdown(self):
         if self.status == 0:
             return ""
-        return super().as_html
-
-    @property
-    def as_markdown(self):
-        if self.status == 0:
-            return ""
-        return super().as_markdown
+        return super().get_markdown()
     
     
     @property
@@ -1191,11 +1557,14 @@ class Header(TextLine):
         "components"
         "level"
     '''
-    def __init__(self, content: dict = dict(), parent = None) -> None:
-        super().__init__(content, parent)
-        self.level = str(content.get("level", '1'))
-        self.attrs = ['level']
-        self.insert_type = ['TextElement', 'URLElement', 'InlineList']
+    attrs = ('level',)
+    __slots__ = ('level',)
+    # opening and closing Markup by level (see heading_tags).
+    level_tags: dict[str, tuple] = dict()
+
+    def __init__(self, content: dict = dict(), parent = None, components: list = None) -> None:
+        super().__init__(content, parent, components)
+        self.level = intern(str(content.get("level", '1')))
     
     def __str__(self):
         return f"Header([{self.components_str}], level={self.level}, status={self.status})"
@@ -1206,17 +1575,32 @@ class Header(TextLine):
             "level": self.level,
         }
     
-    @property
-    def as_html(self):
-        if self.status == 0:
-            return ""
-        return f"<h{self.level}>{super().as_html}</h{self.level}>"
-
-    @property
-    def as_markdown(self):
+    def html_content(self, segment, run, depth):
+        if self.status == 1:
+            open_header, close_header = self.heading_tags()
+            add_markup(run, open_header)
+            super().html_content(segment, run, depth)
+            add_markup(run, close_header)
+
+    def heading_tags(self) -> tuple:
+        # returns the opening and closing Markup of the level of self. The
+        #   markdown of a level that is not a number is left None, and fails
+        #   to render (see write_markdown_pieces).
+        tags = self.level_tags.get(self.level)
+        if tags is None:
+            level = self.level
+            try:
+                markdown = f"\n\n{"#"*int(level)} "
+            except ValueError:
+                markdown = None
+            tags = self.level_tags[level] = (
+                Tag(f"<h{level}>", markdown), Tag(f"</h{level}>", "\n"))
+        return tags
+
+    def get_markdown(self):
         if self.status == 0:
             return ""
-        return f"\n\n{"#"*int(self.level)} {super().as_markdown}\n"
+        return f"\n\n{"#"*int(self.level)} {super().get_markdown()}\n"
     
     @property
     def display_color(self):
@@ -1234,23 +1618,16 @@ class InlineList(Itemization):
     content's keys:
         "components"
     '''
-    def __init__(self, content: dict = dict(), parent = None) -> None:
-        super().__init__(content, parent)
-        self.insert_type = ['TextElement', 'URLElement']
-
+    insert_type = ('TextElement', 'URLElement')
+    __slots__ = ()
+    separator = Markup(", ")
 
     def __str__(self):
         return f"InlineList([{self.components_str}, status={self.status}])"
     
-    @property
-    def as_html(self):
-        if self.status == 0:
-            return ""
-        return f"{', '.join(component.as_html for component in self.components
-                            if component.get_bottom_component().getattr('status')==1)}"
+    html_content = Sequence.html_content
 
-    @property
-    def as_markdown(self):
+    def get_markdown(self):
         if self.status == 0:
             return ""
         return f"{', '.join(component.as_markdown for component in self.components
@@ -1271,25 +1648,28 @@ class UnorderedList(Itemization):
     content's key:
         "components"
     '''
-
-    def __init__(self, content: dict = dict(), parent = None) -> None:
-        super().__init__(content, parent)
-        self.insert_type = ['Header', 'TextLine', 'InlineList']
+    insert_type = ('Header', 'TextLine', 'InlineList')
+    __slots__ = ()
+    # the tags around the list and around each item
+    tags = (Markup("<ul>"), Markup("<li>"), Markup("</li>"), Markup("</ul>"))
 
     def __str__(self):
         return f"UnorderedList([{self.components_str}, status={self.status}])"
     
-    @property
-    def as_html(self):
+    def html_content(self, segment, run, depth):
         if self.status == 0:
-            return ""
-        body = "".join(f"<li>{component.as_html}</li>" 
-                       for component in self.components
-                       if component.get_bottom_component().getattr('status')==1)
-        return f"<ul>{body}</ul>"
+            return
+        depth += 1
+        open_list, open_item, close_item, close_list = self.tags
+        add_markup(run, open_list)
+        for component in self.components:
+            if component.get_bottom_component().status == 1:
+                add_markup(run, open_item)
+                component.html_emit(segment, run, depth)
+                add_markup(run, close_item)
+        add_markup(run, close_list)
 
-    @property
-    def as_markdown(self):
+    def get_markdown(self):
         if self.status == 0:
             return ""
         body = "".join(f"<li>{component.as_markdown}</li>"
@@ -1313,11 +1693,20 @@ class Tabular(Itemization):
         "components"
         "table_width"
     '''
-    def __init__(self, content: dict = dict(), parent = None) -> None:
-        super().__init__(content, parent)
-        self.table_width = str(content.get("table_width", '1'))
-        self.attrs = ['table_width']
-        self.insert_type = ['TextElement', 'URLElement', 'TextLine']
+    attrs = ('table_width',)
+    insert_type = ('TextElement', 'URLElement', 'TextLine')
+    __slots__ = ('table_width',)
+    # the tags around the table, each row and each cell
+    tags = (
+        Tag('<table style="width:100%;border-collapse:collapse;text-align:left;table-layout: fixed;">',
+            '<table>'),
+        Markup("<tr>"), Markup("</tr>"), Markup("<td>"), Markup("</td>"),
+        Tag("</table>", "</table>\n"),
+    )
+
+    def __init__(self, content: dict = dict(), parent = None, components: list = None) -> None:
+        super().__init__(content, parent, components)
+        self.table_width = intern(str(content.get("table_width", '1')))
 
     
     def __str__(self):
@@ -1337,34 +1726,38 @@ class Tabular(Itemization):
             return 3
 
     
-    @property
-    def as_html(self):
+    def html_content(self, segment, run, depth):
         if self.status == 0:
-            return ""
-        cmpn_len = len(self.components)
-        html = '<table style="width:100%;border-collapse:collapse;text-align:left;table-layout: fixed;">'
+            return
+        depth += 1
+        open_table, open_row, close_row, open_cell, close_cell, close_table = self.tags
+        add_markup(run, open_table)
         width = self.width
-        for i in range(0, cmpn_len, width):
-            row = self.components[i:i+width]
-            inner = ''.join(f'<td>{component.as_html}</td>' for component in row if
-                            component.get_bottom_component().getattr('status')==1)
-            html += f"<tr>{inner}</tr>"
-        html += '</table>'
-        return html
+        for i, component in enumerate(self.components):
+            if i % width == 0:
+                if i:
+                    add_markup(run, close_row)
+                add_markup(run, open_row)
+            if component.get_bottom_component().status == 1:
+                add_markup(run, open_cell)
+                component.html_emit(segment, run, depth)
+                add_markup(run, close_cell)
+            else:
+                # the markdown of a table keeps its hidden cells
+                run.append(HiddenCell(component))
+        if self.components:
+            add_markup(run, close_row)
+        add_markup(run, close_table)
     
-    @property
-    def as_markdown(self):
+    def get_markdown(self):
         if self.status == 0:
             return ""
-        cmpn_len = len(self.components)
-        md = '<table>'
+        components = self.components
         width = self.width
-        for i in range(0, cmpn_len, width):
-            row = self.components[i:i+width]
-            inner = ''.join(f'<td>{component.as_markdown}</td>' for component in row)
-            md += f"<tr>{inner}</tr>"
-        md += '</table>\n'
-        return md 
+        rows = ("".join(f'<td>{component.as_markdown}</td>'
+                        for component in components[i:i+width])
+                for i in range(0, len(components), width))
+        return "".join(f"<tr>{row}</tr>" for row in rows).join(('<table>', '</table>\n'))
     
     @property
     def display_color(self):
@@ -1382,13 +1775,23 @@ class Decorator(ContentTreeNode):
     content's key:
         "component"
     '''
-    def __init__(self, content: dict = dict(), parent = None) -> None:
+    attrs = ()
+    __slots__ = ('component',)
+    # a plain decorator has no markdown of its own
+    close_tag = Tag("</span>")
+
+    def __init__(
+            self,
+            content: dict = dict(),
+            parent = None,
+            component: ContentTreeNode = None) -> None:
+        # component, if given, is the already built node to use instead of
+        #   that of content (see get_content_tree).
         super().__init__(content, parent)
-        self.set_component(
-            get_content_tree(content.get("component", TextElement().as_dict)
-            ))
-        self.attrs = list()
-        self.decorator_type = []
+        if component is None:
+            component = content.get("component")
+            component = TextElement() if component is None else get_content_tree(component)
+        self.set_component(component)
 
     def __str__(self) -> str:
         return f"Decorator({self.component.__str__()}, status={self.status})"
@@ -1403,15 +1806,18 @@ class Decorator(ContentTreeNode):
             "component": self.component.as_dict,
         }
 
-    @property
-    def as_html(self):
-        content_html = self.component.as_html
+    def html_content(self, segment, run, depth):
         if self.status == 0:
-            return content_html
-        return f'<span style="{self.get_style()}">{content_html}</span>'
+            self.component.html_emit(segment, run, depth + 1)
+            return
+        run.append(self.open_tag())
+        self.component.html_emit(segment, run, depth + 1)
+        add_markup(run, self.close_tag)
 
-    @property
-    def as_markdown(self):
+    def open_tag(self) -> Tag:
+        return Tag(f'<span style="{self.get_style()}">')
+
+    def get_markdown(self):
         return self.component.as_markdown
 
     @property
@@ -1516,9 +1922,16 @@ class Decorator(ContentTreeNode):
         )
         coordinate[0] = init_x
 
+    def get_bottom_component(self):
+        cur = self.component
+        while isinstance(cur, Decorator):
+            cur = cur.component
+        return cur
+
     def set_component(self, component: ContentTreeNode):
         self.component = component
         self.component.setattr('parent',self)
+        self.mark_modified()
     
     def get_style(self):
         return ""
@@ -1527,6 +1940,7 @@ class Decorator(ContentTreeNode):
         if component1 == self.component:
             self.component = component2
             self.component.setattr('parent',self)
+            self.mark_modified()
     
     def parent_replace(self, component):
         if not self.parent is None:
@@ -1539,10 +1953,13 @@ class Decorator(ContentTreeNode):
         self.component.parent = self.parent
         if not self.parent is None:
             self.parent.replace(self, self.component)
+        else:
+            self.component.mark_modified()
         return self.component
 
-    def pre_order(self):
-        return [self] + self.component.pre_order()
+    @property
+    def children(self):
+        return (self.component,)
 
 
 class StyledFont(Decorator):
@@ -1557,14 +1974,19 @@ class StyledFont(Decorator):
         ""
 
     '''
-    def __init__(self, content: dict = dict(), parent = None) -> None:
-        super().__init__(content, parent)
-        self.font_size: str = content.get('font_size', '1em')
-        self.font_family: str = content.get("font_family", 'Montserrat')
+    attrs = ('font_size', 'font_family','bold', 'italic', 'underline')
+    __slots__ = attrs
+    close_tag = Markup("</span>")
+    # opening tags by font, shared by the nodes with the same font.
+    open_tags: dict[tuple, Tag] = dict()
+
+    def __init__(self, content: dict = dict(), parent = None, component: ContentTreeNode = None) -> None:
+        super().__init__(content, parent, component)
+        self.font_size: str = intern(content.get('font_size', '1em'))
+        self.font_family: str = intern(content.get("font_family", 'Montserrat'))
         self.bold: int = content.get("bold", 0)
         self.italic: int = content.get("italic", 0)
         self.underline: int = content.get("underline", 0)
-        self.attrs = ['font_size', 'font_family','bold', 'italic', 'underline']
     
 
 
@@ -1584,18 +2006,21 @@ class StyledFont(Decorator):
             "underline": self.underline,
         }
     
-    @property
-    def as_html(self):
-        return super().as_html
-    
-    @property
-    def as_markdown(self):
+    def get_markdown(self):
         if self.status == 0:
             return self.component.as_markdown
-        body = super().as_markdown
+        body = super().get_markdown()
         styles = self.get_font_style()
         return f'<span style="{styles}">{body}</span>'
 
+    def open_tag(self):
+        key = (self.font_size, self.font_family, self.bold, self.italic, self.underline)
+        tag = self.open_tags.get(key)
+        if tag is None:
+            tag = self.open_tags[key] = Tag(
+                f'<span style="{self.get_style()}">', f'<span style="{self.get_font_style()}">')
+        return tag
+
     def get_style(self):
         return f"font: {self.font_size} {self.font_family};" + self.get_font_style()
     
@@ -1622,13 +2047,19 @@ class BoxMargin(Decorator):
         "margin_s"
         "margin_w"
     '''
-    def __init__(self, content: dict = dict(), parent = None) -> None:
-        super().__init__(content, parent)
-        self.margin_n = content.get("margin_n", "0px")
-        self.margin_e = content.get("margin_e", "0px")
-        self.margin_s = content.get("margin_s", "0px")
-        self.margin_w = content.get("margin_w", "0px")
-        self.attrs = ["margin_n", "margin_e", "margin_s", "margin_w"]
+    attrs = ("margin_n", "margin_e", "margin_s", "margin_w")
+    __slots__ = attrs
+    # the markdown of a box is quoted (see write_markdown_pieces)
+    close_tag = BoxEndTag("</div>")
+    # opening tags by margins, shared by the nodes with the same margins.
+    open_tags: dict[tuple, Tag] = dict()
+
+    def __init__(self, content: dict = dict(), parent = None, component: ContentTreeNode = None) -> None:
+        super().__init__(content, parent, component)
+        self.margin_n = intern(content.get("margin_n", "0px"))
+        self.margin_e = intern(content.get("margin_e", "0px"))
+        self.margin_s = intern(content.get("margin_s", "0px"))
+        self.margin_w = intern(content.get("margin_w", "0px"))
 
     def  __str__(self):
         return f'BoxMargin({self.component}, style={self.get_style()}, status={self.status})'
@@ -1642,16 +2073,15 @@ class BoxMargin(Decorator):
             "margin_w": self.margin_w,
         }
     
-    @property
-    def as_html(self):
-        content_html = self.component.as_html
-        if self.status == 0:
-            return content_html
-        return f'<div style="{self.get_style()}">{content_html}</div>'
+    def open_tag(self):
+        key = (self.margin_n, self.margin_e, self.margin_s, self.margin_w)
+        tag = self.open_tags.get(key)
+        if tag is None:
+            tag = self.open_tags[key] = BoxTag(f'<div style="{self.get_style()}">')
+        return tag
 
     
-    @property
-    def as_markdown(self):
+    def get_markdown(self):
         content_md = self.component.as_markdown
         if self.status == 0:
             return content_md
@@ -1663,13 +2093,193 @@ class BoxMargin(Decorator):
 
 
 
+class NodeIndex:
+    '''
+    An index of the nodes of a tree by id.
+
+    Nodes get an id (node_id) when first indexed, which they keep while they
+    move around the tree. The index subscribes to the root and, on every
+    modification, reconciles only the children of the modified node, so it
+    stays correct across insert, pop, swap, replace and decorated without
+    walking the tree again.
+    '''
+    counter = itertools.count()
+
+    def __init__(self, root: ContentTreeNode) -> None:
+        self.root = root
+        self.nodes: dict[int, ContentTreeNode] = dict()
+        self.children: dict[int, tuple] = dict()
+        self.add(root)
+        root.subscribe(self.update)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __contains__(self, node_id: int) -> bool:
+        return node_id in self.nodes
+
+    def __getitem__(self, node_id: int) -> ContentTreeNode:
+        return self.nodes[node_id]
+
+    def get(self, node_id: int, default = None) -> ContentTreeNode:
+        return self.nodes.get(node_id, default)
+
+    def path(self, node_id: int) -> list[int]:
+        # returns the path of a node (see ContentTreeNode.path).
+        return self.nodes[node_id].path
+
+    def close(self):
+        self.root.unsubscribe(self.update)
+
+    def add(self, node: ContentTreeNode):
+        # indexes the subtree of node.
+        for cur in node.iter_pre_order():
+            if cur.node_id is None:
+                cur.node_id = next(self.counter)
+            self.nodes[cur.node_id] = cur
+            self.children[cur.node_id] = tuple(cur.children)
+
+    def discard(self, node: ContentTreeNode):
+        # removes the subtree of node, as it was indexed.
+        stack = [node]
+        while stack:
+            cur = stack.pop()
+            self.nodes.pop(cur.node_id, None)
+            stack.extend(self.children.pop(cur.node_id, ()))
+
+    def attached(self, node: ContentTreeNode) -> bool:
+        # whether node is in the tree, e.g. after being moved to another
+        #   parent before being popped from its old one.
+        cur = node
+        while not cur is self.root:
+            parent = cur.parent
+            if parent is None or not any(child is cur for child in parent.children):
+                return False
+            cur = parent
+        return True
+
+    def update(self, node: ContentTreeNode):
+        # reconciles the children of a modified node with the index.
+        old = self.children.get(node.node_id)
+        if old is None or self.nodes.get(node.node_id) is not node:
+            return
+        new = tuple(node.children)
+        if len(old) == len(new) and all(a is b for a, b in zip(old, new)):
+            return
+        self.children[node.node_id] = new
+        new_ids = {id(child) for child in new}
+        old_ids = {id(child) for child in old}
+        for child in old:
+            if not id(child) in new_ids and not self.attached(child):
+                self.discard(child)
+        for child in new:
+            if not id(child) in old_ids:
+                self.add(child)
+
+
+
 '''
 Functions that generate ContentTreeNodes
 '''
-def get_content_tree(content: dict|None) -> ContentTreeNode:
-    if content is None:
-        return None
-    return getattr(sys.modules[__name__], content["type"])(content)
+def node_matches(node: ContentTreeNode, types = None, status: int = None) -> bool:
+    # whether node is one of types (class names or classes) and has status.
+    if not status is None and node.status != status:
+        return False
+    if types is None:
+        return True
+    return any(node.class_name == t if isinstance(t, str) else isinstance(node, t)
+               for t in types)
+
+
+# Markup joined by add_markup, by the Markup joined. Only fixed markup is
+#   joined, so the dict stays small whatever the size of the resume.
+joined_markup: dict[tuple, Markup] = dict()
+
+
+def add_markup(run: list, markup: Markup):
+    # appends markup to run, joined to the last string of run if both are
+    #   Markup (not a Tag), e.g. "</span>" and ", " into "</span>, ". This
+    #   saves a run about a third of its strings.
+    if run and run[-1].__class__ is Markup and markup.__class__ is Markup:
+        key = (run[-1], markup)
+        joined = joined_markup.get(key)
+        if joined is None:
+            joined = joined_markup[key] = Markup(key[0] + markup)
+        run[-1] = joined
+    else:
+        run.append(markup)
+
+
+def write_markdown_pieces(pieces: list, write: Callable):
+    # writes the markdown of the html pieces of a tree (see html_pieces) to
+    #   write: text and Markup as they are, a Tag as its markdown and a hidden
+    #   cell as the markdown of its node. The lines within a box start with
+    #   "> " (once per enclosing box), as in BoxMargin.get_markdown.
+    quote = ""
+    for piece in pieces:
+        cls = piece.__class__
+        if cls is str or cls is Markup:
+            text = piece
+        elif cls is Tag:
+            text = Tag.markdown[piece]
+            if text is None:
+                raise ValueError(f"no markdown for {piece!r}")
+        elif cls is BoxTag:
+            write("> ")
+            quote += "> "
+            continue
+        elif cls is BoxEndTag:
+            quote = quote[2:]
+            continue
+        else:
+            text = f"<td>{piece.node.as_markdown}</td>"
+        if quote:
+            text = text.replace("\n", "\n" + quote)
+        write(text)
+
+
+def intern(value):
+    # interns strings repeated across nodes (info, font and margin values),
+    #   so that a loaded resume keeps one copy of each.
+    if type(value) is str:
+        return sys.intern(value)
+    return value
+
+
+def get_content_tree(content: dict|ContentTreeNode|None) -> ContentTreeNode:
+    # builds the tree of content (see as_dict) without recursion: the
+    #   dictionaries are listed parents first, then built in reverse order,
+    #   so every node is created with its already built components, passed
+    #   to the constructor as they are. Classes are looked up in
+    #   ContentTreeNode.registry, and only an Itemization takes components
+    #   (a Decorator, its component), whatever other keys a dictionary has.
+    #   Already built nodes are returned as is.
+    if content is None or isinstance(content, ContentTreeNode):
+        return content
+    registry = ContentTreeNode.registry
+    order = []
+    stack = [content]
+    while stack:
+        cur = stack.pop()
+        cls = registry[cur["type"]]
+        order.append((cur, cls))
+        if issubclass(cls, Itemization):
+            stack.extend(cur.get("components") or ())
+        elif issubclass(cls, Decorator) and cur.get("component") is not None:
+            stack.append(cur["component"])
+    built = []
+    for cur, cls in reversed(order):
+        if issubclass(cls, Itemization):
+            start = len(built) - len(cur.get("components") or ())
+            node = cls(cur, components=built[start:])
+            del built[start:]
+        elif issubclass(cls, Decorator):
+            component = built.pop() if cur.get("component") is not None else None
+            node = cls(cur, component=component)
+        else:
+            node = cls(cur)
+        built.append(node)
+    return built[0]
 
 
 
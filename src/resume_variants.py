@@ -0,0 +1,130 @@
+"""
+File: resume_variants.py
+
+Description:
+    This module renders role variants of a master resume. A variant is a named
+selection of nodes to enable or disable (see ContentTreeNode.get_node for the
+path format). Every variant is materialized on a copy of the master content, so
+the master is never modified, and all variants are printed concurrently through
+one shared BrowserPool.
+
+    A variant file is a JSON object mapping variant names to selections:
+    {
+        "backend": {"disable": ["Projects/Project Samples/0"]},
+        "frontend": {"enable": ["Skills/Skill Categories/0"], "disable": ["Experience"]}
+    }
+
+Usage (from the repository root):
+    python -m src.resume_variants resume_0 variants.json --out variants --jobs 4
+"""
+
+
+
+import argparse
+import json
+import os
+import os.path as osp
+import time
+
+from .browser_pool import BrowserPool
+from .resume_content import ResumeContent
+from .batch_export import ExportResult, render_resume
+
+
+
+class VariantSpec:
+    '''
+    A named selection of nodes of a resume. Nodes in enable get status 1 and
+    nodes in disable get status 0 (disable is applied last).
+    '''
+    def __init__(self, name: str, enable: list = [], disable: list = []) -> None:
+        self.name = name
+        self.enable = list(enable)
+        self.disable = list(disable)
+
+    def __str__(self) -> str:
+        return f"VariantSpec({self.name}, enable={self.enable}, disable={self.disable})"
+
+    def apply(self, content):
+        # sets the status of the selected nodes of content.
+        for path in self.enable:
+            content.get_node(path).setattr('status', 1)
+        for path in self.disable:
+            content.get_node(path).setattr('status', 0)
+
+
+def load_specs(path: str) -> list[VariantSpec]:
+    with open(path, 'r') as f:
+        specs = json.loads(f.read())
+    return [VariantSpec(name, selection.get("enable", []), selection.get("disable", []))
+            for name, selection in specs.items()]
+
+
+def materialize(master: ResumeContent, spec: VariantSpec) -> ResumeContent:
+    # returns the variant of master selected by spec, leaving master untouched.
+    content = master.content.clone()
+    spec.apply(content)
+    return ResumeContent(f"{master.id}_{spec.name}", master.browser_pool, content)
+
+
+def render_variants(
+        master: ResumeContent,
+        specs: list[VariantSpec],
+        out_dir: str = None,
+        browser_pool: BrowserPool = None) -> list[ExportResult]:
+    # prints every variant of master to out_dir/<master id>_<name>.pdf
+    #   (resume/ if out_dir is None), through browser_pool if given and the
+    #   pool of master otherwise.
+    if browser_pool is None:
+        browser_pool = master.browser_pool
+    if out_dir is None:
+        out_dir = osp.dirname(master.content_path)
+    os.makedirs(out_dir, exist_ok=True)
+
+    results = list()
+    futures = list()
+    for spec in specs:
+        result = ExportResult(f"{master.id}_{spec.name}", None)
+        results.append(result)
+        try:
+            start = time.perf_counter()
+            variant = materialize(master, spec)
+            result.path = osp.join(out_dir, f"{variant.id}.pdf")
+            html = variant.as_html
+            result.load_time = time.perf_counter() - start
+        except Exception as e:
+            result.error = e
+            continue
+        futures.append(
+            (result, browser_pool.submit(render_resume(browser_pool, html, result.path))))
+
+    for result, future in futures:
+        try:
+            result.render_time = future.result()
+        except Exception as e:
+            result.error = e
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exports role variants of a resume to pdf.")
+    parser.add_argument("id", help="id of the master resume")
+    parser.add_argument("variants", help="JSON file of variant selections")
+    parser.add_argument("--out", default=None, help="output directory (default: resume/)")
+    parser.add_argument("--jobs", type=int, default=4, help="pages printing at the same time")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with BrowserPool(size=args.jobs) as pool:
+        master = ResumeContent(args.id, pool)
+        results = render_variants(master, load_specs(args.variants), args.out)
+    elapsed = time.perf_counter() - start
+
+    for result in results:
+        print(result)
+    succeeded = sum(result.succeeded for result in results)
+    print(f"Exported {succeeded}/{len(results)} variant(s) in {elapsed:.1f} s.")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,8 @@ import tkinter as tk
 import tkinter.scrolledtext as st
 from tkinter import messagebox 
 from PIL import Image, ImageTk
+from .image_cache import ImageCache
+from .render_trace import get_tracer
 class GraphicalUserInterface:
     '''
     A GUI class through tkinter
@@ -72,6 +74,9 @@ class GraphicalUserInterface:
                  height=DEFAULT_HEIGHT):
         self.state = 'start'
         self.threads = list()
+        self.exit_handlers = list()
+        self.resize_handlers = list()
+        self.image_cache = ImageCache()
         self.title = title
         self.root = tk.Tk()
         self.root.geometry(f'{width}x{height}')
@@ -92,11 +97,25 @@ class GraphicalUserInterface:
         self.root.withdraw()
         for t in self.threads:
             t.join()
+        for handler in self.exit_handlers:
+            handler()
         self.root.quit()
 
     def push_thread(self, thread):
         self.threads.append(thread)
 
+    def push_exit_handler(self, handler):
+        # registers a function called on exit, after all threads are joined.
+        self.exit_handlers.append(handler)
+
+    def push_resize_handler(self, handler):
+        # registers a function called after the window is resized.
+        self.resize_handlers.append(handler)
+
+    def remove_resize_handler(self, handler):
+        if handler in self.resize_handlers:
+            self.resize_handlers.remove(handler)
+
     @property
     def get_state(self):
         return self.state
@@ -122,6 +141,8 @@ class GraphicalUserInterface:
         self.geometry = [w,h]
         for tag in self.frames.keys():
             self.update_frame_geometry(tag)
+        for handler in list(self.resize_handlers):
+            handler()
     
     def update_frame_geometry(self, tag):
         canvas = self.frames[tag][0]
@@ -471,28 +492,75 @@ class GraphicalUserInterface:
     def pop_mb_question(self, title: str = None, message:str = None):
         return messagebox.askquestion(title=title, message=message)
     
-    def load_images(self, master_tag:str, images: list, width_ratio = 1):
-        self.clear_frame_content(master_tag)
+    def get_canvas_width(self, master_tag:str):
+        canvas = self.frames[master_tag][0]
+        canvas.update_idletasks()
+        return canvas.winfo_width()
+
+    def load_images(self, master_tag:str, images: list, width_ratio = 1, keys: list = None):
+        # shows images in the frame, one label per image. If keys are given,
+        #   a label already showing the image of the same key at the same
+        #   width is left as is, so only changed pages are swapped in. The
+        #   PhotoImage of a label is reused when the new image has its size,
+        #   and resized images of keyed pages are cached by (key, width).
+        #   Returns the number of bytes copied into Tk.
+        with get_tracer().span("load_images", images=len(images)):
+            return self.load_frame_images(master_tag, images, width_ratio, keys)
+
+    def load_frame_images(self, master_tag:str, images: list, width_ratio, keys: list):
+        # does the work of load_images, which times it.
         master = self.frames[master_tag][1]
         widgets = self.frames[master_tag][2]
         canvas = self.frames[master_tag][0]
         canvas.update_idletasks()
         canvas_width = canvas.winfo_width()
-        for i, img in enumerate(images):
-            image = ImageTk.PhotoImage(self.resized_image(img, canvas_width*width_ratio))
+        new_width = canvas_width*width_ratio
+        bytes_copied = 0
+        if keys is None:
+            self.clear_frame_content(master_tag)
+            keys = [None]*len(images)
+        for i, (img, key) in enumerate(zip(images, keys)):
             label_tag = f"image_{i}"
             if not label_tag in widgets.keys():
-                widgets[label_tag] = tk.Label(master, image=image)
+                # pages rasterized with alpha are transparent where the pdf
+                #   leaves them blank, showing the label's background.
+                widgets[label_tag] = tk.Label(master, background="white")
             image_label = widgets[label_tag]
-            image_label.config(image=image)
-            image_label.image = image
-            image_label.pack(fill='x', expand=True)
+            label_key = None if key is None else (key, new_width)
+            if label_key is None or getattr(image_label, 'key', None) != label_key:
+                with get_tracer().span("resize"):
+                    resized = self.resized_image(img, new_width, key)
+                with get_tracer().span("tk_image"):
+                    image = getattr(image_label, 'image', None)
+                    if image is not None and (image.width(), image.height()) == resized.size:
+                        image.paste(resized)
+                    else:
+                        image = ImageTk.PhotoImage(resized)
+                        image_label.config(image=image)
+                        image_label.image = image
+                image_label.key = label_key
+                bytes_copied += resized.width*resized.height*len(resized.getbands())
+            if not image_label.winfo_manager():
+                image_label.pack(fill='x', expand=True)
+        i = len(images)
+        while f"image_{i}" in widgets.keys():
+            widgets[f"image_{i}"].pack_forget()
+            i += 1
         self.update_frame_geometry(master_tag)
+        return bytes_copied
     
-    def resized_image(self, img: Image.Image, new_width:float):
+    def resized_image(self, img: Image.Image, new_width:float, key = None):
+        # images already rasterized at (about) new_width are not resized.
+        #   If key identifies the image, the resized image is cached.
         im_w, im_h = img.size
+        if abs(im_w - int(new_width)) <= 1:
+            return img
         ratio = new_width/im_w
-        return img.resize((int(im_w*ratio), int(im_h*ratio)))
+        new_size = (int(im_w*ratio), int(im_h*ratio))
+        if key is None:
+            return img.resize(new_size)
+        return self.image_cache.get_or_create(
+            (key, new_size), lambda: img.resize(new_size))
 
 
     def read_text(self, text:tk.Widget):
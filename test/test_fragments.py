@@ -0,0 +1,60 @@
+"""
+File: test_fragments.py
+
+Description:
+    Regression tests of the cached output of the content tree: the html
+segments of the Sequences (ContentTreeNode.html_pieces), the memoized
+markdown (ContentTreeNode.as_markdown) and the markdown written from the html
+pieces (ContentTreeNode.write_markdown). After every random edit, the output
+must match that of a tree freshly built from the dictionary of the edited tree.
+
+Usage (from the repository root):
+    python -m unittest discover -s test -p "test_*.py"
+"""
+
+
+
+import random
+import unittest
+
+from src.resume_content import ResumeContent
+from src.resume_content_tree import get_content_tree
+from benchmark.synthetic import synthetic_resume
+from tree_edits import EDITS, random_edit
+
+
+
+class FragmentTest(unittest.TestCase):
+    def replay(self, check, steps: int = 150):
+        # calls check(root, edit) before and after each of steps random
+        #   edits, on synthetic resumes of several seeds.
+        for seed in range(3):
+            root = get_content_tree(synthetic_resume("template", seed=seed, decorator_density=0.5))
+            rng = random.Random(seed)
+            check(root, "start")
+            edits = set()
+            for step in range(steps):
+                edit = random_edit(root, rng)
+                edits.add(edit)
+                check(root, f"{seed}/{step}: {edit}")
+            self.assertEqual(edits, set(EDITS))
+
+    def test_cached_output(self):
+        def check(root, edit):
+            fresh = get_content_tree(root.as_dict)
+            self.assertEqual(root.as_html, fresh.as_html, edit)
+            self.assertEqual(root.as_markdown, fresh.as_markdown, edit)
+        self.replay(check)
+
+    def test_render_ir(self):
+        resumes = dict()
+        def check(root, edit):
+            resume = resumes.setdefault(id(root), ResumeContent("test", content=root))
+            fresh = get_content_tree(root.as_dict)
+            self.assertEqual(resume.as_html, f"{resume.HTML_HEADER}<body>{fresh.get_html()}</body>", edit)
+            self.assertEqual(resume.as_markdown, fresh.get_markdown(), edit)
+        self.replay(check)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+File: test_node_index.py
+
+Description:
+    Tests of the iterative traversals of ContentTreeNode and of NodeIndex, which
+must stay consistent with the tree across structural edits.
+
+Usage (from the repository root):
+    python -m unittest discover -s test -p "test_*.py"
+"""
+
+
+
+import random
+import types
+import unittest
+
+from src.resume_content_tree import get_content_tree, Itemization, NodeIndex
+from benchmark.synthetic import synthetic_resume
+from tree_edits import random_edit
+
+
+
+def recursive_pre_order(node) -> list:
+    order = [node]
+    for child in node.children:
+        order += recursive_pre_order(child)
+    return order
+
+
+def recursive_post_order(node) -> list:
+    order = []
+    for child in node.children:
+        order += recursive_post_order(child)
+    return order + [node]
+
+
+class TraversalTest(unittest.TestCase):
+    def setUp(self):
+        self.tree = get_content_tree(synthetic_resume("1k", decorator_density=0.5))
+
+    def assertSameNodes(self, nodes, expected):
+        self.assertEqual([id(node) for node in nodes], [id(node) for node in expected])
+
+    def test_orders(self):
+        expected = recursive_pre_order(self.tree)
+        self.assertSameNodes(self.tree.pre_order(), expected)
+        self.assertSameNodes(self.tree.iter_pre_order(), expected)
+        self.assertSameNodes(self.tree.iter_post_order(), recursive_post_order(self.tree))
+
+    def test_filters(self):
+        expected = [node for node in recursive_pre_order(self.tree) if isinstance(node, Itemization)]
+        self.assertSameNodes(self.tree.iter_pre_order([Itemization]), expected)
+        expected = [node for node in expected if node.class_name == "TextLine"]
+        self.assertSameNodes(self.tree.iter_pre_order(["TextLine"]), expected)
+        self.tree.get_node("0").setattr('status', 0)
+        expected = [node for node in recursive_pre_order(self.tree) if node.status == 0]
+        self.assertSameNodes(self.tree.iter_pre_order(status=0), expected)
+
+    def test_lazy(self):
+        # the first nodes are yielded before the rest of the tree is walked,
+        #   so a change made meanwhile is seen.
+        nodes = self.tree.iter_pre_order()
+        self.assertIsInstance(nodes, types.GeneratorType)
+        self.assertIs(next(nodes), self.tree)
+        sections = self.tree.get_bottom_component()
+        last = sections.pop(len(sections.components) - 1)
+        self.assertFalse(any(node is last for node in nodes))
+
+
+class NodeIndexTest(unittest.TestCase):
+    def check(self, root, index, edit):
+        nodes = root.pre_order()
+        self.assertEqual({id(node) for node in nodes},
+                         {id(node) for node in index.nodes.values()}, edit)
+        for node in nodes:
+            self.assertIs(index[node.node_id], node, edit)
+            self.assertIs(root.get_node(node.path), node.get_bottom_component(), edit)
+
+    def test_random_edits(self):
+        for seed in range(3):
+            root = get_content_tree(synthetic_resume("template", seed=seed))
+            index = NodeIndex(root)
+            rng = random.Random(seed)
+            self.check(root, index, "start")
+            for step in range(200):
+                edit = random_edit(root, rng)
+                self.check(root, index, f"{step}: {edit}")
+            index.close()
+            self.assertNotIn(index.update, root.listeners)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+File: tree_edits.py
+
+Description:
+    Random edits of a content tree, replayed by the tests: structural edits
+(insert, pop, remove, swap, insert_clone, decorated, pop_self, moving a node to
+another itemization) and edits of status and values, all through the methods
+the editor uses.
+"""
+
+
+
+import random
+
+from src.resume_content_tree import ContentTreeNode, Itemization, Decorator, StyledFont, BoxMargin
+
+
+
+EDITS = ["swap", "insert_clone", "pop", "move", "insert_remove", "decorated",
+         "pop_self", "value", "status"]
+
+
+
+def random_edit(root: ContentTreeNode, rng: random.Random) -> str:
+    # applies a random edit (one of EDITS, on a node it applies to) to the
+    #   tree of root. Returns the name of the edit.
+    nodes = root.pre_order()
+    items = [node for node in nodes if isinstance(node, Itemization) and node.components]
+    while True:
+        edit = rng.choice(EDITS)
+        if edit == "swap":
+            candidates = [node for node in items if len(node.components) > 1]
+        elif edit == "pop":
+            candidates = [node for node in items if len(node.components) > 2]
+        elif edit in ("insert_clone", "move", "insert_remove"):
+            candidates = items
+        elif edit == "decorated":
+            # not under the decorators of the root, which would replace it
+            candidates = [node for node in nodes if not isinstance(node, Decorator)
+                          and node.get_decorated_structure()[-1].parent is not None]
+        elif edit == "pop_self":
+            candidates = [node for node in nodes
+                          if node.parent is not None and isinstance(node, Decorator)]
+        elif edit == "value":
+            candidates = [node for node in nodes if hasattr(node, "value")]
+        else:
+            candidates = nodes
+        if candidates:
+            break
+    node = rng.choice(candidates)
+
+    if edit == "swap":
+        node.swap(0, len(node.components)-1)
+    elif edit == "insert_clone":
+        node.insert_clone(rng.randrange(len(node.components)))
+    elif edit == "pop":
+        node.pop(1)
+    elif edit == "move":
+        # pops a component, then inserts it in an itemization of the tree
+        component = node.pop(0)
+        others = [n for n in root.pre_order() if isinstance(n, Itemization)]
+        rng.choice(others).insert(component, 0)
+    elif edit == "insert_remove":
+        # inserts a component in another itemization before removing it
+        #   from node
+        component = node.components[-1]
+        inside = {id(n) for n in component.iter_pre_order()}
+        others = [n for n in nodes if isinstance(n, Itemization)
+                  and n is not node and not id(n) in inside]
+        if not others:
+            return random_edit(root, rng)
+        rng.choice(others).insert(component)
+        node.remove(component, reset_parent=False)
+    elif edit == "decorated":
+        decorator = StyledFont({"bold": 1}) if rng.random() < 0.5 else \
+            BoxMargin({"margin_n": "2px"})
+        node.decorated(decorator)
+    elif edit == "pop_self":
+        node.pop_self()
+    elif edit == "value":
+        node.setattr('value', f"{node.value} {rng.randrange(100)}\nline")
+    else:
+        node.setattr('status', 1 - node.status)
+    return edit